@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Memory benchmark of elaboration of generated netlist with N registered
+expressions (tracemalloc peak after building of netlist and after synthesize())
+
+Every toolkit path is measured in separate python process, before/after
+comparison of some change can be done with checkout of older revision, e.g.:
+
+    git worktree add /tmp/hwt_before <revision before change>
+    python3 benchmarks/elaborationMemory.py 20000 /tmp/hwt_before .
+
+usage: python3 benchmarks/elaborationMemory.py [N] [toolkit path ...]
+"""
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+
+def buildNetlist(N):
+    """
+    @return: tuple (netlist, interface signals)
+    """
+    from hdl_toolkit.hdlObjects.typeShortcuts import vecT
+    from hdl_toolkit.synthesizer.codeOps import If
+    from hdl_toolkit.synthesizer.rtlLevel.netlist import RtlNetlist
+
+    n = RtlNetlist()
+    en = n.sig("en")
+    ins = [n.sig("i%d" % k, vecT(8)) for k in range(16)]
+    prev = ins
+    outs = []
+    for k in range(N):
+        x = n.sig("x%d" % k, vecT(8))
+        If(en,
+           x ** ((prev[k % 16] ^ ins[(k * 3) % 16]) & ~prev[(k + 1) % 16] | ins[k % 7])
+        )
+        outs.append(x)
+        prev = prev[1:] + [x]
+
+    return n, [en] + ins + outs[-16:]
+
+
+def measure(N):
+    """
+    @return: tuple (build peak, synthesize peak, number of signals, time)
+    """
+    tracemalloc.start()
+    t = time.perf_counter()
+    n, interfaces = buildNetlist(N)
+    _, buildPeak = tracemalloc.get_traced_memory()
+    n.synthesize("big", interfaces)
+    _, synthPeak = tracemalloc.get_traced_memory()
+    t = time.perf_counter() - t
+    tracemalloc.stop()
+
+    return buildPeak, synthPeak, len(n.signals), t
+
+
+if __name__ == "__main__":
+    N = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    paths = sys.argv[2:]
+    if not paths:
+        buildPeak, synthPeak, signals, t = measure(N)
+        print("%d signals, build peak %.1f MB, synthesize peak %.1f MB, %.2fs"
+              % (signals, buildPeak / 1e6, synthPeak / 1e6, t))
+    else:
+        for p in paths:
+            env = dict(os.environ)
+            env["PYTHONPATH"] = os.pathsep.join(
+                [os.path.abspath(p), env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+            out = subprocess.check_output([sys.executable, os.path.abspath(__file__), str(N)],
+                                          env=env, universal_newlines=True)
+            print("%s: %s" % (p, out.strip()))
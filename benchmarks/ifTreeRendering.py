@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of if tree rendering (assigRenderer.renderIfTree) on generated FSM
+with N states, two transitions per state and Switch over the state register
+
+Every group of assignments is rendered by renderIfTree and by reference
+renderer (the original implementation with list.index() in sort key,
+list.remove() and where() scans) and serialized statements are compared.
+
+usage: python3 benchmarks/ifTreeRendering.py [N ...]
+"""
+import sys
+import time
+
+from hdl_toolkit.hdlObjects.types.enum import Enum
+from hdl_toolkit.interfaces.std import VectSignal
+from hdl_toolkit.interfaces.utils import addClkRstn
+from hdl_toolkit.intfLvl import Unit, FsmBuilder, Switch
+from hdl_toolkit.serializer.vhdlSerializer import VhdlSerializer
+from hdl_toolkit.synthesizer.assigRenderer import _renderIfTree, renderIfTree
+from hdl_toolkit.synthesizer.assigRendererContainers import IfTreeNode
+from hdl_toolkit.synthesizer.rtlLevel import netlist
+from hdl_toolkit.synthesizer.shortcuts import toRtl
+from hdl_toolkit.synthesizer.termUsageResolver import extractCondTermOrder
+from python_toolkit.arrayQuery import where
+
+
+def mkFsmUnit(N):
+    """
+    @return: Unit class with FsmBuilder with N states
+    """
+    class BigFsm(Unit):
+        def _declr(self):
+            addClkRstn(self)
+            self.i = VectSignal(8)
+            self.o = VectSignal(16)
+
+        def _impl(self):
+            stT = Enum("st_t", ["s%d" % k for k in range(N)])
+            vals = stT._allValues
+            fsm = FsmBuilder(self, stT)
+            for k in range(N):
+                fsm = fsm.Trans(stT.fromPy(vals[k]),
+                    (self.i._eq(k % 256), stT.fromPy(vals[(k + 1) % N])),
+                    (self.i._eq((k + 128) % 256), stT.fromPy(vals[(k * 3) % N])),
+                    stT.fromPy(vals[k]))
+
+            sw = Switch(fsm.stateReg)
+            for k in range(N):
+                sw = sw.Case(stT.fromPy(vals[k]), self.o ** k)
+
+    return BigFsm
+
+
+# reference renderer, _unresolvedConds are lists of tuples (cond, isNegated)
+def refExtractCondTermOrderNonResolved(assignments, globalCondOrder):
+    usageCnt = {}
+    maxStmId = {}
+    resolved = []
+    for a in assignments:
+        if not a._unresolvedConds:
+            resolved.append(a)
+        else:
+            for c, _ in a._unresolvedConds:
+                usageCnt[c] = usageCnt.get(c, 0) + 1
+                maxStmId[c] = max(a._instId, maxStmId.get(c, 0))
+
+    condOrder = sorted(usageCnt.keys(),
+                       key=lambda t: (usageCnt[t], globalCondOrder.index(t), maxStmId[t]),
+                       reverse=True)
+    return resolved, condOrder
+
+
+def refRenderIfTree_afterCondSatisfied(assignments, globalCondOrder):
+    top, topConds = refExtractCondTermOrderNonResolved(assignments, globalCondOrder)
+    if not topConds:
+        return top
+
+    for a in top:
+        assignments.remove(a)
+    topIf, notDependent = refSplitIfTreeOnCond(assignments, topConds[0], topConds[1:])
+    ifs = [topIf]
+    if notDependent:
+        ifs.extend(refRenderIfTree_afterCondSatisfied(notDependent, globalCondOrder))
+    return ifs
+
+
+def refSplitIfTreeOnCond(assignments, topCond, globalCondOrder):
+    topPos = []
+    topNeg = []
+    notDependent = []
+    for a in assignments:
+        dependent = list(where(a._unresolvedConds, lambda c: c[0] is topCond))
+        if not dependent:
+            notDependent.append(a)
+        elif len(dependent) == 1:
+            c = dependent[0]
+            a._unresolvedConds.remove(c)
+            if c[1]:
+                topNeg.append(a)
+            else:
+                topPos.append(a)
+        else:
+            raise NotImplementedError(dependent)
+
+    top = IfTreeNode(topCond)
+    top.pos = refRenderIfTree_afterCondSatisfied(topPos, globalCondOrder)
+    top.neg = refRenderIfTree_afterCondSatisfied(topNeg, globalCondOrder)
+    return top, notDependent
+
+
+def refRenderIfTree(assignments):
+    condOrder = list(extractCondTermOrder(assignments))
+    for a in assignments:
+        a._unresolvedConds = [(c, f) for c, flags in a._unresolvedConds.items()
+                              for f in flags]
+    while condOrder:
+        top, assignments = refSplitIfTreeOnCond(assignments, condOrder[0], condOrder)
+        yield from _renderIfTree(top)
+        if not assignments:
+            return
+        condOrder = list(extractCondTermOrder(assignments))
+        for a in assignments:
+            a._unresolvedConds = [(c, f) for c, flags in a._unresolvedConds.items()
+                                  for f in flags]
+    yield from assignments
+
+
+def asHdl(statements):
+    return [VhdlSerializer.asHdl(s) for s in statements]
+
+
+def benchmark(N):
+    """
+    @return: tuple (renderIfTree time, reference renderer time, toRtl time)
+    """
+    times = [0.0, 0.0]
+
+    def checkedRenderIfTree(assignments):
+        assignments = sorted(assignments, key=lambda a: a._instId)
+        t = time.perf_counter()
+        ref = list(refRenderIfTree(list(assignments)))
+        times[1] += time.perf_counter() - t
+
+        t = time.perf_counter()
+        stms = list(renderIfTree(assignments))
+        times[0] += time.perf_counter() - t
+
+        if asHdl(stms) != asHdl(ref):
+            raise AssertionError("renderIfTree output differs from reference renderer for %r"
+                                 % assignments[0].dst)
+        return stms
+
+    netlist.renderIfTree = checkedRenderIfTree
+    try:
+        t = time.perf_counter()
+        toRtl(mkFsmUnit(N)())
+        total = time.perf_counter() - t
+    finally:
+        netlist.renderIfTree = renderIfTree
+
+    return times[0], times[1], total - times[1]
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [50, 100, 200]
+    print("%8s %14s %14s %10s" % ("states", "renderIfTree", "reference", "toRtl"))
+    for N in sizes:
+        new, ref, total = benchmark(N)
+        print("%8d %13.3fs %13.3fs %9.3fs" % (N, new, ref, total))
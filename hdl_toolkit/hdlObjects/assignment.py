@@ -13,6 +13,8 @@ class Assignment(object):
     @ivar _instId: internaly used only for intuitive sorting of statements
     """
     __instCntr = 0
+    __slots__ = ["src", "dst", "isEventDependent", "indexes", "cond", "_instId",
+                 "_unresolvedConds"]
     
     def __init__(self, src, dst, indexes=None):
         self.src = src
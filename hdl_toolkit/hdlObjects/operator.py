@@ -1,6 +1,7 @@
 from copy import deepcopy
 
 from hdl_toolkit.hdlObjects.function import Function
+from hdl_toolkit.hdlObjects.operatorDefs import AllOps
 from hdl_toolkit.hdlObjects.value import Value
 from hdl_toolkit.synthesizer.rtlLevel.rtlSignal import RtlSignal, RtlSignalBase 
 
@@ -15,6 +16,49 @@ def getCtxFromOps(ops):
     raise TypeError("Can not find context because there is no signal in ops")
     
 
+# operand order of EQ/NEQ is not canonicalized because switch statement
+# detection in assigRenderer expects signal as first operand
+COMMUTATIVE_OPS = (AllOps.AND_LOG, AllOps.OR_LOG, AllOps.XOR,
+                   AllOps.ADD, AllOps.MUL)
+
+def _operandKey(o):
+    if isinstance(o, Value):
+        return (o.__class__, o._dtype, o.val, o.vldMask)
+    return o
+
+def _operandKeyOrder(k):
+    if isinstance(k, RtlSignalBase):
+        return (0, k._instId)
+    else:
+        return (1, hash(k))
+
+def _typeKey(t):
+    # vector types are often instantiated for each signal separately,
+    # type with static width is identified by its width not by its constrain
+    c = getattr(t, "constrain", None)
+    if isinstance(c, Value):
+        return (t.__class__, t.signed, t.forceVector,
+                tuple(_operandKey(v) for v in c.val))
+    return t
+
+def operatorKey(opDef, operands, resT):
+    """
+    Key for structural hashing of operators, operands of commutative
+    operators are sorted
+    
+    @return: key or None if operator can not be hashed
+    """
+    ks = [_operandKey(o) for o in operands]
+    try:
+        if opDef in COMMUTATIVE_OPS:
+            ks.sort(key=_operandKeyOrder)
+        k = (opDef, tuple(ks), _typeKey(resT))
+        hash(k)
+    except TypeError:
+        return None
+    return k
+
+
 class Operator():
     """
     Class of operator in expression tree
@@ -23,6 +67,8 @@ class Operator():
     @ivar operator: OpDefinition instance 
     @ivar result: result signal of this operator
     """
+    __slots__ = ["ops", "operator", "result", "_isDriver"]
+
     def __init__(self, operator, operands):
         self.ops = list(operands)
         self.operator = operator
@@ -69,24 +115,44 @@ class Operator():
         """
         return self.operator.eval(self, simulator=simulator)
     
-    def __eq__(self, other):
-        return self is other or (
-             type(self) == type(other) 
-            and self.operator == other.operator \
-            and self.ops == other.ops)
+    def structuralKey(self):
+        """
+        Key for structural comparison of operators
+        (__eq__ and __hash__ are based on identity because operators
+        are stored in endpoints/drivers of signals and operands can change)
+        
+        @return: key or None if operator can not be hashed
+        """
+        return operatorKey(self.operator, self.ops, self.result._dtype)
     
     @staticmethod
     def withRes(opDef, operands, resT, outputs=[]):
         """
-        Create operator with result signal
+        Create operator with result signal,
+        if the same operator already exists in netlist its result is returned
         """
+        ctx = getCtxFromOps(operands)
+        # params are not part of any netlist
+        cache = getattr(ctx, "opCache", None)
+        k = None
+        if cache is not None and not outputs:
+            k = operatorKey(opDef, operands, resT)
+            if k is not None:
+                try:
+                    return cache[k]
+                except KeyError:
+                    pass
+        
         op = Operator(opDef, operands)
-        out = RtlSignal(getCtxFromOps(operands), None, resT)
+        out = RtlSignal(ctx, None, resT)
         out.drivers.append(op)
         out.origin = op
         op.result = out
         op.registerSignals(outputs)
         
+        if k is not None:
+            cache[k] = out
+        
         return out
     
     def __deepcopy__(self, memo=None):
@@ -95,15 +161,12 @@ class Operator():
         except KeyError:
             o = Operator(None, [])
             memo[id(self)] = o
-            for k, v in self.__dict__.items():
-                setattr(o, k, deepcopy(v, memo))
+            for k in self.__slots__:
+                setattr(o, k, deepcopy(getattr(self, k), memo))
 
             return o
                 
-    def __hash__(self):
-        return hash((self.operator, frozenset(self.ops)))
-    
-        
+
     def __repr__(self):
         return "<%s operator:%s, ops:%s>" % (self.__class__.__name__,
                                              repr(self.operator), repr(self.ops))
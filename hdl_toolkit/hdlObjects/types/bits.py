@@ -3,6 +3,7 @@ from copy import copy
 from hdl_toolkit.hdlObjects.specialValues import Unconstrained
 from hdl_toolkit.hdlObjects.types.hdlType import HdlType 
 from hdl_toolkit.bitmask import mask
+from hdl_toolkit.synthesizer.rtlLevel.mainBases import ParamVersion
 
 
 class Bits(HdlType):
@@ -19,10 +20,14 @@ class Bits(HdlType):
             self.constrain = Unconstrained()
         else:
             self.constrain = widthConstr
+        # (constrain, ParamVersion, width)
+        self._widthCache = None
+        # (width, mask)
+        self._maskCache = None
     
     def __eq__(self, other):
-        return isinstance(other, Bits) and other.bit_length() == self.bit_length()\
-            and self.signed == other.signed and self.forceVector == other.forceVector
+        return self is other or (isinstance(other, Bits) and other.bit_length() == self.bit_length()\
+            and self.signed == other.signed and self.forceVector == other.forceVector)
     
     def __hash__(self):
         return hash((self.signed, id(self.constrain), self.forceVector))
@@ -34,19 +39,34 @@ class Bits(HdlType):
         return s
     
     def all_mask(self):
-        return mask(self.bit_length())
+        w = self.bit_length()
+        c = self._maskCache
+        if c is None or c[0] != w:
+            c = self._maskCache = (w, mask(w))
+        return c[1]
     
     def bit_length(self):
-        if isinstance(self.constrain, (int, float)):
-            return int(self.constrain)
-        elif isinstance(self.constrain, Unconstrained):
+        """
+        Width resolved from parametrized constrain is cached until value
+        of some Param is changed (or constrain is replaced)
+        """
+        constr = self.constrain
+        if isinstance(constr, (int, float)):
+            return int(constr)
+        elif isinstance(constr, Unconstrained):
             try:
-                return self.constrain.derivedWidth
+                return constr.derivedWidth
             except AttributeError:
                 return None
         else:
-            w = self.constrain.staticEval()
-            return abs(w.val[0].val - w.val[1].val) + 1 
+            c = self._widthCache
+            v = ParamVersion.actual
+            if c is not None and c[0] is constr and c[1] == v:
+                return c[2]
+            w = constr.staticEval()
+            w = abs(w.val[0].val - w.val[1].val) + 1
+            self._widthCache = (constr, v, w)
+            return w
 
     
     
@@ -3,6 +3,8 @@ from hdl_toolkit.synthesizer.rtlLevel.mainBases import RtlSignalBase
 
 class SignalItem(object):
     """basic hdl signal"""
+    __slots__ = ["name", "_dtype", "defaultVal", "_val", "_oldVal", "__weakref__"]
+
     def __init__(self, name, dtype, defaultVal=None):
         self.name = name
         self._dtype = dtype
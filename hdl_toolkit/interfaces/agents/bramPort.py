@@ -1,17 +1,21 @@
+from collections import deque
+
 from hdl_toolkit.hdlObjects.specialValues import READ, WRITE
 from hdl_toolkit.simulator.agentBase import SyncAgentBase
+from hdl_toolkit.simulator.dataQueue import DataQueue, popleft
 from hdl_toolkit.simulator.shortcuts import oscilate
+from hdl_toolkit.simulator.simMemory import simMemory
 
 
 class BramPort_withoutClkAgent(SyncAgentBase):
     """
-    @ivar requests: list of tuples (request type, address) - used for driver
+    @ivar requests: DataQueue of tuples (request type, address[, data]) - used for driver
     @ivar data:     list of data in memory, used for monitor
     """
     def __init__(self, intf, clk=None, rstn=None):
         super().__init__(intf, clk=clk, rstn=rstn, allowNoReset=True)
         
-        self.requests = []
+        self.requests = DataQueue()
         self.readPending = False
         self.readed = []
 
@@ -49,10 +53,10 @@ class BramPort_withoutClkAgent(SyncAgentBase):
         
         yield s.updateComplete
         if self.enable and s.read(intf.en).val:
-            we = self.read(intf.we)
-            addr = self.read(intf.addr)
+            we = s.read(intf.we)
+            addr = s.read(intf.addr)
             if we.val:
-                data = self.read(intf.din)
+                data = s.read(intf.din)
                 self.onWriteReq(s, addr, data)
             else:
                 self.onReadReq(s, addr)
@@ -71,7 +75,7 @@ class BramPort_withoutClkAgent(SyncAgentBase):
         intf = self.intf
         readPending = self.readPending
         if self.requests and self.enable:
-            req = self.requests.pop(0)
+            req = popleft(self.requests)
             if req is None:
                 s.w(0, intf.en)
                 self.readPending = False
@@ -85,7 +89,7 @@ class BramPort_withoutClkAgent(SyncAgentBase):
         if readPending:
             yield s.updateComplete
             d = s.r(intf.dout)
-            self.readed.append(d)
+            self._collect(s, self.readed, d)
     
 
 
@@ -97,3 +101,93 @@ class BramPortAgent(BramPort_withoutClkAgent):
         
     def getSubDrivers(self):
         yield oscilate(self.intf.clk)
+
+
+_NO_READ = object()
+
+
+class BramPortMemAgent(BramPort_withoutClkAgent):
+    """
+    Agent which behaves as memory connected to BramPort(_withoutClk) of unit
+
+    Memory content is stored in SimMemory (NumPy arrays of values and validity),
+    read data appears on dout readLatency clock cycles after request,
+    reads of uninitialized or invalid words returns invalid value.
+
+    @ivar mem: SimMemory with content of memory
+    @ivar readLatency: number of clock cycles between read request and data on dout
+    """
+    def __init__(self, intf, clk=None, rstn=None, readLatency=1, mem=None, sparse=None):
+        """
+        @param mem: SimMemory, if not specified it is created for whole address space
+        @param sparse: use SparseSimMemory, resolved from size of address space if None
+        """
+        if clk is None:
+            try:
+                clk = intf.clk
+            except AttributeError:
+                pass
+        super().__init__(intf, clk=clk, rstn=rstn)
+        self.addrWidth = intf.addr._dtype.bit_length()
+        self.dataWidth = intf.din._dtype.bit_length()
+        self._addrMask = (1 << self.addrWidth) - 1
+        self._dataMask = (1 << self.dataWidth) - 1
+        if mem is None:
+            mem = simMemory(1 << self.addrWidth, self.dataWidth, sparse=sparse)
+        self.mem = mem
+        self.readLatency = readLatency
+        # items are read data or _NO_READ for cycles without read
+        self._readPipeline = deque(_NO_READ for _ in range(readLatency))
+        self._readData = _NO_READ
+
+    def preload(self, data, offset=0, vld=None):
+        """
+        Preload memory from array, list or file (.npy or raw binary)
+        """
+        if isinstance(data, str):
+            self.mem.loadFile(data, offset=offset)
+        else:
+            self.mem.preload(data, offset=offset, vld=vld)
+
+    def dump(self, offset=0, size=None):
+        """
+        @return: tuple (values, vld) NumPy arrays with content of memory
+        """
+        return self.mem.dump(offset, size)
+
+    def onReadReq(self, s, addr):
+        if addr.vldMask != self._addrMask:
+            self._readData = None
+            return
+        v, vld = self.mem.read(addr.val)
+        if vld:
+            self._readData = int(v)
+        else:
+            self._readData = None
+
+    def onWriteReq(self, s, addr, data):
+        if addr.vldMask != self._addrMask:
+            raise AssertionError("%r: write to invalid address %r" % (self.intf, addr))
+        vld = data.vldMask == self._dataMask
+        self.mem.write(addr.val, data.val if vld else 0, vld)
+
+    def monitor(self, s):
+        intf = self.intf
+
+        yield s.updateComplete
+        self._readData = _NO_READ
+        if self.enable and s.read(intf.en).val:
+            we = s.read(intf.we)
+            addr = s.read(intf.addr)
+            if we.val:
+                data = s.read(intf.din)
+                self.onWriteReq(s, addr, data)
+            else:
+                self.onReadReq(s, addr)
+
+        p = self._readPipeline
+        p.append(self._readData)
+        rd = p.popleft()
+        if rd is not _NO_READ:
+            s.w(rd, intf.dout)
+
@@ -1,11 +1,12 @@
 from hdl_toolkit.simulator.agentBase import SyncAgentBase
+from hdl_toolkit.simulator.dataQueue import DataQueue, popleft
 
 
 class FifoReaderAgent(SyncAgentBase):
     
     def __init__(self, intf, clk=None, rstn=None, allowNoReset=False):
         super(FifoReaderAgent, self).__init__(intf, clk, rstn, allowNoReset)
-        self.data = []
+        self.data = DataQueue()
         self.readPending = False
         
     def monitor(self, s):
@@ -13,7 +14,7 @@ class FifoReaderAgent(SyncAgentBase):
         if self.readPending:
             yield s.updateComplete
             d = s.read(intf.data)
-            self.data.append(d)
+            self._collect(s, self.data, d)
             self.readPending = False
         if s.r(self.rst_n).val and self.enable:
             
@@ -33,6 +34,10 @@ class FifoReaderAgent(SyncAgentBase):
         raise NotImplementedError()
 
 class FifoWriterAgent(SyncAgentBase):
+    
+    def __init__(self, intf, clk=None, rstn=None, allowNoReset=False):
+        super(FifoWriterAgent, self).__init__(intf, clk, rstn, allowNoReset)
+        self.data = DataQueue()
         
     def monitor(self, s):
         raise NotImplementedError()
@@ -42,7 +47,7 @@ class FifoWriterAgent(SyncAgentBase):
         
         if s.r(self.rst_n).val and not s.r(intf.wait).val \
            and self.data and self.enable:
-            s.w(self.data.pop(0), intf.data)
+            s.w(popleft(self.data), intf.data)
             s.w(1, intf.en)
         else:
             s.w(None, intf.data)
@@ -1,4 +1,5 @@
 from hdl_toolkit.simulator.agentBase import SyncAgentBase
+from hdl_toolkit.simulator.dataQueue import DataQueue, popleft
 from hdl_toolkit.hdlObjects.specialValues import NOP
 
 
@@ -6,7 +7,7 @@ class HandshakedAgent(SyncAgentBase):
     def __init__(self, intf, clk=None, rstn=None):
         super().__init__(intf, clk=None, rstn=None)
         self.actualData = NOP
-        self.data = []
+        self.data = DataQueue()
         # these signals are extracted like this to make 
         # agent more configurable
         self._rd = self.getRd()
@@ -28,10 +29,13 @@ class HandshakedAgent(SyncAgentBase):
             s.w(1, self._rd)
             
             yield s.updateComplete
+            # ready is read back because it may be driven by someone else
+            # (e.g. stimulus replay)
+            rd = s.r(self._rd)
             vld = s.r(self._vld)
-            if vld.val or not vld.vldMask:
+            if rd.val and (vld.val or not vld.vldMask):
                 d = self.doRead(s)
-                self.data.append(d)
+                self._collect(s, self.data, d)
         else:
             s.w(0, self._rd)
     
@@ -43,7 +47,7 @@ class HandshakedAgent(SyncAgentBase):
         
     def driver(self, s):
         if self.actualData is NOP and self.data:
-            self.actualData = self.data.pop(0)
+            self.actualData = popleft(self.data)
         
         do = self.actualData is not NOP
         
@@ -63,7 +67,7 @@ class HandshakedAgent(SyncAgentBase):
         rd = s.r(self._rd) 
         if rd.val or not rd.vldMask:
             if self.data:
-                self.actualData = self.data.pop(0)
+                self.actualData = popleft(self.data)
             else:
                 self.actualData = NOP
 
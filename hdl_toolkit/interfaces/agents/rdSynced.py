@@ -1,4 +1,5 @@
 from hdl_toolkit.simulator.agentBase import SyncAgentBase
+from hdl_toolkit.simulator.dataQueue import popleft
 
 
 class RdSyncedAgent(SyncAgentBase):
@@ -18,7 +19,7 @@ class RdSyncedAgent(SyncAgentBase):
             yield s.updateComplete
             
             d = self.doRead(s)
-            self.data.append(d)
+            self._collect(s, self.data, d)
         else:
             s.w(0, intf.rd)
     
@@ -35,7 +36,7 @@ class RdSyncedAgent(SyncAgentBase):
         intf = self.intf
         
         if self.actualData is None and self.data:
-            self.actualData = self.data.pop(0)
+            self.actualData = popleft(self.data)
         
         self.doWrite(s, self.actualData)
         if self.notReset(s) and self.actualData is not None and self.enable:
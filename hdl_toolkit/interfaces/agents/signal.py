@@ -1,5 +1,6 @@
 from hdl_toolkit.hdlObjects.specialValues import Time
 from hdl_toolkit.simulator.agentBase import AgentBase
+from hdl_toolkit.simulator.dataQueue import DataQueue, popleft
 from hdl_toolkit.simulator.shortcuts import onRisingEdge
 
 
@@ -16,7 +17,7 @@ class SignalAgent(AgentBase):
         self.clk = clk
         self.rstn = rstn
         self.intf = intf
-        self.data = []
+        self.data = DataQueue()
         
         self.initPending = True 
         
@@ -42,13 +43,13 @@ class SignalAgent(AgentBase):
             # clk tick
             while True:
                 if self.data:
-                    self.doWrite(s, self.data.pop(0))
+                    self.doWrite(s, popleft(self.data))
                 yield s.wait(self.delay)
         else:
             # if clock is specified this function is periodicaly called every
             # clk tick
             if self.data:
-                self.doWrite(s, self.data.pop(0))
+                self.doWrite(s, popleft(self.data))
     
     
     def monitor(self, s):
@@ -60,12 +61,12 @@ class SignalAgent(AgentBase):
             while True:
                 yield s.updateComplete
                 d = self.doRead(s)
-                self.data.append(d)
+                self._collect(s, self.data, d)
                 yield s.wait(self.delay)
         else:
             # if clock is specified this function is periodicaly called every
             # clk tick
             yield s.updateComplete
             d = self.doRead(s)
-            self.data.append(d)
+            self._collect(s, self.data, d)
 
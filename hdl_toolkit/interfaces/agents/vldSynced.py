@@ -1,11 +1,12 @@
 from hdl_toolkit.simulator.agentBase import SyncAgentBase
+from hdl_toolkit.simulator.dataQueue import DataQueue, popleft
 from hdl_toolkit.hdlObjects.specialValues import NOP
 
 
 class VldSyncedAgent(SyncAgentBase):
     def __init__(self, intf, clk=None, rstn=None, allowNoReset=False):
         super(VldSyncedAgent, self).__init__(intf, clk=clk, rstn=rstn, allowNoReset=allowNoReset)
-        self.data = []
+        self.data = DataQueue()
     
     def doRead(self, s):
         return s.read(self.intf.data)
@@ -16,13 +17,13 @@ class VldSyncedAgent(SyncAgentBase):
     def monitor(self, s):
         intf = self.intf
         if self.enable and self.notReset(s) and s.r(intf.vld).val:
-            self.data.append(self.doRead(s))
+            self._collect(s, self.data, self.doRead(s))
             
     def driver(self, s):
         intf = self.intf
         
         if self.enable and self.data and self.notReset(s):
-            d = self.data.pop(0)
+            d = popleft(self.data)
             if d is NOP:
                 self.doWrite(s, None)
                 s.w(0, intf.vld)
@@ -0,0 +1,218 @@
+import json
+
+import numpy as np
+
+from hdl_toolkit.hdlObjects.specialValues import Time
+from hdl_toolkit.simulator.hdlSimConfig import HdlSimConfig
+from hdl_toolkit.synthesizer.interfaceLevel.interfaceUtils.utils import walkPhysInterfaces
+
+
+def intfNamesOfUnit(unit):
+    """
+    @return: dict {physical name of signal: name of top interface of unit}
+    """
+    names = {}
+    for i in unit._interfaces:
+        for p in walkPhysInterfaces(i):
+            names[p._getPhysicalName()] = i._name
+    return names
+
+
+class SignalActivityInfo():
+    """
+    @ivar id: index of signal in activity arrays
+    @ivar unitPath: tuple of names of sim model units from top to unit of signal
+    @ivar intfName: name of interface of unit which signal belongs to
+                    (None if signal is internal or unit was not specified)
+    """
+    __slots__ = ["id", "name", "unitPath", "intfName", "width"]
+
+    def __init__(self, _id, name, unitPath, intfName, width):
+        self.id = _id
+        self.name = name
+        self.unitPath = unitPath
+        self.intfName = intfName
+        self.width = width
+
+
+class ActivityHdlSimConfig(HdlSimConfig):
+    """
+    Simulator config which counts value changes (and toggled bits)
+    of every signal in time buckets
+
+    Counters are stored in preallocated NumPy arrays indexed by
+    [time bucket, signal id], array is doubled when simulation runs
+    longer than expected.
+
+    @ivar changes: array of numbers of value changes [bucket, signal id]
+    @ivar toggles: array of numbers of toggled bits [bucket, signal id]
+    @ivar signals: list of SignalActivityInfo indexed by signal id
+    """
+    def __init__(self, bucketSize=100 * Time.ns, expectedTime=100 * Time.us,
+                 unit=None, countToggles=True):
+        """
+        @param bucketSize: time span of one bucket
+        @param expectedTime: expected length of simulation (used for preallocation)
+        @param unit: optional interface level unit of simulated model,
+                     it is used to aggregate activity per interface
+        @param countToggles: if False only value changes are counted
+        """
+        super().__init__()
+        self.logPropagation = False
+        self.logApplyingValues = False
+        self.bucketSize = bucketSize
+        self.expectedTime = expectedTime
+        self.unit = unit
+        self.countToggles = countToggles
+
+        self.signals = []
+        self._sigIds = {}
+        self._lastVal = []
+        # masks of widths of signals (values of signed signals can be negative)
+        self._masks = []
+        self.changes = None
+        self.toggles = None
+        self.endTime = 0
+
+    def _registerUnit(self, model, unitPath, unit):
+        unitPath = unitPath + (model._name,)
+        if unit is None:
+            intfNames = {}
+        else:
+            intfNames = intfNamesOfUnit(unit)
+
+        for s in sorted(model._cntx.signals, key=lambda s: s.name):
+            _id = len(self.signals)
+            try:
+                width = s._dtype.bit_length()
+            except (AttributeError, TypeError):
+                width = 1
+            info = SignalActivityInfo(_id, s.name, unitPath,
+                                      intfNames.get(s.name, None), width)
+            self.signals.append(info)
+            self._sigIds[s] = _id
+            self._lastVal.append(None)
+            self._masks.append((1 << width) - 1)
+
+        subUnits = {}
+        if unit is not None:
+            for u in unit._units:
+                try:
+                    subUnits[u._entity.name] = u
+                except AttributeError:
+                    pass
+
+        for m in model._units:
+            self._registerUnit(m, unitPath, subUnits.get(m._name, None))
+
+    def beforeSim(self, simulator, synthesisedUnit):
+        self._registerUnit(synthesisedUnit, (), self.unit)
+        bucketCnt = int(self.expectedTime // self.bucketSize) + 1
+        shape = (bucketCnt, len(self.signals))
+        self.changes = np.zeros(shape, dtype=np.int64)
+        if self.countToggles:
+            self.toggles = np.zeros(shape, dtype=np.int64)
+
+    def _grow(self, bucket):
+        size = self.changes.shape[0]
+        while size <= bucket:
+            size *= 2
+        pad = ((0, size - self.changes.shape[0]), (0, 0))
+        self.changes = np.pad(self.changes, pad)
+        if self.toggles is not None:
+            self.toggles = np.pad(self.toggles, pad)
+
+    def logChange(self, nowTime, sig, nextVal):
+        try:
+            i = self._sigIds[sig]
+        except KeyError:
+            return
+
+        b = int(nowTime // self.bucketSize)
+        if b >= self.changes.shape[0]:
+            self._grow(b)
+        self.changes[b, i] += 1
+        if nowTime > self.endTime:
+            self.endTime = nowTime
+
+        if self.toggles is not None:
+            v = nextVal.val
+            last = self._lastVal[i]
+            self._lastVal[i] = v
+            if isinstance(v, int) and isinstance(last, int):
+                self.toggles[b, i] += bin((v ^ last) & self._masks[i]).count("1")
+
+    def heatmap(self, toggles=False):
+        """
+        @return: tuple (array [used bucket, signal id], list of full signal names)
+        """
+        data = self.toggles if toggles else self.changes
+        usedBuckets = int(self.endTime // self.bucketSize) + 1
+        names = [".".join(s.unitPath + (s.name,)) for s in self.signals]
+        return data[:usedBuckets], names
+
+    def report(self, clkPeriod=None):
+        """
+        Aggregate activity to hierarchy of units and interfaces
+
+        @param clkPeriod: if specified activity factor
+                          (toggles / (width * clock cycles)) is computed
+        @return: dict {"name", "changes", "toggles", "signals", "interfaces", "units"}
+        """
+        changes = self.changes.sum(axis=0)
+        if self.toggles is not None:
+            toggles = self.toggles.sum(axis=0)
+        else:
+            toggles = None
+        if clkPeriod:
+            cycles = max(self.endTime / clkPeriod, 1)
+        else:
+            cycles = None
+
+        def newNode(name):
+            return {"name": name, "changes": 0, "toggles": 0,
+                    "signals": {}, "interfaces": {}, "units": {}}
+
+        root = None
+        for s in self.signals:
+            ch = int(changes[s.id])
+            tg = int(toggles[s.id]) if toggles is not None else 0
+            sigRec = {"changes": ch, "toggles": tg, "width": s.width}
+            if cycles is not None:
+                sigRec["activity"] = tg / (s.width * cycles)
+
+            if root is None:
+                root = newNode(s.unitPath[0])
+            node = root
+            node["changes"] += ch
+            node["toggles"] += tg
+            for name in s.unitPath[1:]:
+                try:
+                    node = node["units"][name]
+                except KeyError:
+                    node = node["units"][name] = newNode(name)
+                node["changes"] += ch
+                node["toggles"] += tg
+
+            node["signals"][s.name] = sigRec
+            if s.intfName is not None:
+                try:
+                    intfRec = node["interfaces"][s.intfName]
+                except KeyError:
+                    intfRec = node["interfaces"][s.intfName] = {"changes": 0,
+                                                                "toggles": 0}
+                intfRec["changes"] += ch
+                intfRec["toggles"] += tg
+
+        return root
+
+    def dumpReport(self, dumpFile, clkPeriod=None):
+        """
+        Write report() as json, dumpFile can be file name or file object
+        """
+        rep = self.report(clkPeriod=clkPeriod)
+        if isinstance(dumpFile, str):
+            with open(dumpFile, "w") as f:
+                json.dump(rep, f, indent=4)
+        else:
+            json.dump(rep, dumpFile, indent=4)
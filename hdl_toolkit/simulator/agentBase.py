@@ -2,10 +2,41 @@ from hdl_toolkit.simulator.shortcuts import onRisingEdge
 from hdl_toolkit.synthesizer.interfaceLevel.mainBases import UnitBase
 
 class AgentBase():
+    """
+    @ivar data: DataQueue (or list) of data for driver or data collected by monitor,
+                use toDataQueue() to feed generators and NumPy arrays lazily
+    @cvar recorder: optional TransactionRecorder, if specified data collected
+                    by monitor are stored in it instead of agent data list
+    @cvar scoreboard: optional Scoreboard, if specified data collected by monitor
+                      are checked by it instead of storing them in agent data list
+    @cvar stats: optional AgentStats with cycle statistics of interface
+    """
+    recorder = None
+    scoreboard = None
+    stats = None
+    
     def __init__(self, intf):
         self.intf = intf
         self.enable = True
     
+    def _collect(self, s, container, d):
+        """
+        Store value collected by monitor
+        
+        @param container: list where value should be stored if there is
+                          no recorder or scoreboard
+        """
+        r = self.recorder
+        sb = self.scoreboard
+        if r is None and sb is None:
+            container.append(d)
+            return
+        
+        if r is not None:
+            r.record(s.now, d)
+        if sb is not None:
+            sb.check(s, d)
+    
     def getDrivers(self):
         return [self.driver]
     
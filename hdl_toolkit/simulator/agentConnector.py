@@ -1,4 +1,7 @@
+import numpy as np
+
 from hdl_toolkit.hdlObjects.specialValues import INTF_DIRECTION
+from hdl_toolkit.simulator.transactionRecorder import columnDtypeFor
 from hdl_toolkit.synthesizer.param import evalParam
 
 def autoAddAgents(unit, propName="_ag"):
@@ -57,9 +60,60 @@ def valToInt(v):
     else:
         return None
 
+def valuesToArrays(values, width=None, signed=None):
+    """
+    Convert iterable of values to NumPy arrays
+    
+    @param width: width of values, resolved from type of first value if None
+    @param signed: signedness of values, resolved from type of first value if None
+    @return: tuple (values array, validity array), invalid values are 0 in values array
+    """
+    values = list(values)
+    if values:
+        t = values[0]._dtype
+        if width is None:
+            try:
+                width = t.bit_length()
+            except (AttributeError, TypeError):
+                width = None
+        if signed is None:
+            signed = bool(getattr(t, "signed", False))
+    
+    vals = np.zeros(len(values), dtype=columnDtypeFor(width, signed))
+    if not values:
+        return vals, np.zeros(0, dtype=np.bool_)
+    
+    raw = np.array([d.val for d in values], dtype=object)
+    vldMasks = np.array([d.vldMask for d in values], dtype=object)
+    if all(d._dtype is t for d in values):
+        vld = vldMasks == t.all_mask()
+    else:
+        # mask is resolved only once for each type
+        masks = dict((_t, _t.all_mask()) for _t in set(d._dtype for d in values))
+        vld = vldMasks == np.array([masks[d._dtype] for d in values], dtype=object)
+    vld = vld.astype(np.bool_)
+    vals[vld] = raw[vld]
+    return vals, vld
+
 def agInts(interface):
     """
     Convert all values which has agent collected in time >=0 to integer array.
     Invalid value will be None.
     """
     return valuesToInts(interface._ag.data)
+
+def agArrays(interface):
+    """
+    Convert all values collected by agent of interface to NumPy arrays,
+    if agent has TransactionRecorder its columns are used directly
+    
+    @return: tuple (values array, validity array)
+    """
+    ag = interface._ag
+    r = ag.recorder
+    if r is not None:
+        vals = r.val.copy()
+        vld = r.vld
+        vals[~vld] = 0
+        return vals, vld
+    return valuesToArrays(ag.data)
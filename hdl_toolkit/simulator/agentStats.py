@@ -0,0 +1,206 @@
+from collections import deque
+
+import numpy as np
+
+from hdl_toolkit.simulator.shortcuts import onRisingEdge
+from hdl_toolkit.simulator.transactionRecorder import GrowableColumn
+
+
+def _findSignal(agent, agentAttr, intfAttrs):
+    try:
+        return getattr(agent, agentAttr)
+    except AttributeError:
+        pass
+    for a in intfAttrs:
+        try:
+            return getattr(agent.intf, a)
+        except AttributeError:
+            pass
+    return None
+
+
+class AgentStats():
+    """
+    Cycle statistics of interface of SyncAgentBase agent
+
+    Signals are sampled on every rising edge of agent clock
+    (after update, same as monitors of agents), cycles in reset are skipped.
+
+    @ivar cycles: number of sampled cycles
+    @ivar validCycles: cycles when valid was 1
+    @ivar readyCycles: cycles when ready was 1
+    @ivar transfers: cycles when valid and ready were 1
+    @ivar backpressure: cycles when valid was 1 and ready was 0
+    @ivar transferCycles: GrowableColumn of cycle indexes of transfers
+    """
+    def __init__(self, agent, vld=None, rd=None, name=None):
+        """
+        @param vld: valid signal, resolved from agent/interface (vld, en) if None
+        @param rd: ready signal, resolved from agent/interface (rd) if None,
+                   if interface has no ready it is considered as always ready
+        """
+        self.agent = agent
+        if vld is None:
+            vld = _findSignal(agent, "_vld", ("vld", "en"))
+        if rd is None:
+            rd = _findSignal(agent, "_rd", ("rd",))
+        self.vld = vld
+        self.rd = rd
+        if name is None:
+            name = agent.intf._name
+        self.name = name
+
+        self.cycles = 0
+        self.validCycles = 0
+        self.readyCycles = 0
+        self.transfers = 0
+        self.backpressure = 0
+        self.transferCycles = GrowableColumn(np.int64)
+        self.listeners = []
+
+        agent.stats = self
+
+    def _isOne(self, s, sig):
+        if sig is None:
+            return True
+        v = s.read(sig)
+        return bool(v.val) and bool(v.vldMask)
+
+    def sample(self, s):
+        yield s.updateComplete
+        if not self.agent.notReset(s):
+            return
+        cycle = self.cycles
+        self.cycles += 1
+
+        vld = self._isOne(s, self.vld)
+        rd = self._isOne(s, self.rd)
+        if rd:
+            self.readyCycles += 1
+        if vld:
+            self.validCycles += 1
+            if rd:
+                self.transfers += 1
+                self.transferCycles.append(cycle)
+                for l in self.listeners:
+                    l(self, cycle)
+            else:
+                self.backpressure += 1
+
+    def getProcess(self):
+        """
+        @return: simulation process which samples interface
+        """
+        return onRisingEdge(self.agent.clk, self.sample)
+
+    def summary(self):
+        """
+        @return: dict with counters and throughput (transfers per cycle)
+                 and stallRatio (backpressure cycles per valid cycle)
+        """
+        cycles = self.cycles
+        return {"name": self.name,
+                "cycles": cycles,
+                "transfers": self.transfers,
+                "validCycles": self.validCycles,
+                "readyCycles": self.readyCycles,
+                "backpressure": self.backpressure,
+                "idle": cycles - self.validCycles,
+                "throughput": self.transfers / cycles if cycles else 0.0,
+                "stallRatio": self.backpressure / self.validCycles if self.validCycles else 0.0}
+
+
+class LatencyStats():
+    """
+    Latency between transfers on request and response interface,
+    n-th response is paired with n-th request (in order interfaces)
+
+    @ivar latencies: GrowableColumn of latencies in clock cycles
+    @ivar pending: deque of cycle indexes of requests which are waiting on response
+    @ivar unmatched: number of responses without request
+                     (response in cycle where there was no pending request
+                      and no request arrived in the same cycle)
+    """
+    def __init__(self, reqStats, respStats, name=None):
+        """
+        @param reqStats: AgentStats of request interface
+        @param respStats: AgentStats of response interface
+                          (should be sampled by the same clock)
+        """
+        if name is None:
+            name = "%s -> %s" % (reqStats.name, respStats.name)
+        self.name = name
+        self.pending = deque()
+        self._earlyResp = deque()
+        self.unmatched = 0
+        self.latencies = GrowableColumn(np.int64)
+        reqStats.listeners.append(self._onReq)
+        respStats.listeners.append(self._onResp)
+
+    def _onReq(self, stats, cycle):
+        earlyResp = self._earlyResp
+        # responses from previous cycles can not belong to this request
+        while earlyResp and earlyResp[0] < cycle:
+            earlyResp.popleft()
+            self.unmatched += 1
+
+        if earlyResp:
+            # response was sampled before request in the same cycle
+            earlyResp.popleft()
+            self.latencies.append(0)
+        else:
+            self.pending.append(cycle)
+
+    def _onResp(self, stats, cycle):
+        try:
+            reqCycle = self.pending.popleft()
+        except IndexError:
+            self._earlyResp.append(cycle)
+            return
+        self.latencies.append(cycle - reqCycle)
+
+    def histogram(self):
+        """
+        @return: array where item i is number of transactions with latency i
+        """
+        lat = self.latencies.array
+        if not len(lat):
+            return np.zeros(0, dtype=np.int64)
+        return np.bincount(lat)
+
+    def summary(self):
+        lat = self.latencies.array
+        d = {"name": self.name,
+             "count": len(lat),
+             "pending": len(self.pending),
+             "unmatched": self.unmatched + len(self._earlyResp)}
+        if len(lat):
+            d.update({"min": int(lat.min()),
+                      "max": int(lat.max()),
+                      "mean": float(lat.mean()),
+                      "p50": float(np.percentile(lat, 50)),
+                      "p99": float(np.percentile(lat, 99)),
+                      "histogram": self.histogram().tolist()})
+        return d
+
+
+def statsReport(stats):
+    """
+    @param stats: iterable of AgentStats and LatencyStats
+    @return: human readable table with summaries
+    """
+    lines = []
+    for st in stats:
+        s = st.summary()
+        if isinstance(st, LatencyStats):
+            if s["count"]:
+                lines.append("%-30s latency min %d max %d mean %.2f p99 %.2f (%d transactions, %d pending, %d unmatched)" % (
+                    s["name"], s["min"], s["max"], s["mean"], s["p99"], s["count"], s["pending"],
+                    s["unmatched"]))
+            else:
+                lines.append("%-30s latency: no transactions (%d pending, %d unmatched)" % (
+                    s["name"], s["pending"], s["unmatched"]))
+        else:
+            lines.append("%-30s %6d transfers / %6d cycles, throughput %.3f, stall ratio %.3f" % (
+                s["name"], s["transfers"], s["cycles"], s["throughput"], s["stallRatio"]))
+    return "\n".join(lines)
@@ -1,4 +1,5 @@
 import sys
+import tempfile
 
 from hdl_toolkit.hdlObjects.architecture import Architecture
 from hdl_toolkit.hdlObjects.entity import Entity
@@ -8,9 +9,9 @@ from hdl_toolkit.hdlObjects.types.bits import Bits
 from hdl_toolkit.hdlObjects.types.boolean import Boolean
 from hdl_toolkit.hdlObjects.types.defs import BIT
 from hdl_toolkit.hdlObjects.types.enum import Enum
+from hdl_toolkit.hdlObjects.types.typeCast import toHVal
 from hdl_toolkit.serializer.vhdlSerializer import VhdlSerializer
 from hdl_toolkit.simulator.hdlSimConfig import HdlSimConfig
-from hdl_toolkit.synthesizer.codeOps import connect
 from hdl_toolkit.synthesizer.interfaceLevel.interfaceUtils.utils import walkPhysInterfaces
 from hdl_toolkit.synthesizer.rtlLevel.netlist import RtlNetlist
 from hdl_toolkit.synthesizer.rtlLevel.rtlSignal import RtlSignal
@@ -45,22 +46,52 @@ def makeTestbenchTemplate(unit, name=None):
     
     return entity, arch, ctx
 
-def mkDriverProc(intf, tbCtx):
+def mkDriverProc(intf, tbCtx, tmpDir=None):
+    """
+    Create driver process for testbench signal, statements of this process
+    are not stored in process but they are serialized to temporary file
+    """
     d = HWProcess(intf._sigInside.name + "_driver")
     d.actualTime = -1
     d.driverFor = tbCtx[intf]
+    # assignment of initial value makes this process driver of the signal,
+    # recorded statements are inserted behind it in dump()
+    d.statements.extend(d.driverFor ** d.driverFor.defaultVal)
+    d.statements.append(WaitStm(None))
+    d.bodyFile = tempfile.TemporaryFile(mode="w+", dir=tmpDir)
     
     return d
 
+def assignmentAsVhdl(val, dst):
+    """
+    Serialize assignment of value to testbench signal
+    (without creating Assignment object in netlist of testbench)
+    """
+    src = toHVal(val)
+    src = src._dtype.convert(src, dst._dtype)
+    return "%s <= %s" % (VhdlSerializer.asHdl(dst), VhdlSerializer.Value(src))
+
 
 class HdlSimConfigVhdlTestbench(HdlSimConfig):
+    """
+    Simulation config which records inputs of top unit as vhdl testbench
+    
+    Statements of driver processes are serialized immediately to temporary
+    file for each driver and these files are merged in dump(),
+    this keeps memory consumption constant for long simulations
+    """
     supported_type_classes = (Boolean, Bits, Enum)
     
-    def __init__(self, top):
+    def __init__(self, top, tmpDir=None):
+        """
+        @param tmpDir: directory for temporary files with bodies of driver processes
+                       (default system temp dir)
+        """
         super().__init__()
         self.logPropagation = False
         self.logApplyingValues = False  
         self.top = top      
+        self.tmpDir = tmpDir
 
         # unit :  signal | unit
         # signal : None
@@ -76,7 +107,7 @@ class HdlSimConfigVhdlTestbench(HdlSimConfig):
 
         def reg(sigIntf):
             """register interface and create diver process for it"""
-            proc = mkDriverProc(sigIntf, self.tbCtx)
+            proc = mkDriverProc(sigIntf, self.tbCtx, self.tmpDir)
             self.registered[sigIntf._sigInside] = proc
             self.tbArch.processes.append(proc)
             
@@ -100,9 +131,9 @@ class HdlSimConfigVhdlTestbench(HdlSimConfig):
                 a = 0
             delay = int(nowTime - a)
             if delay > 0:
-                hwProc.statements.append(
-                    WaitStm(int(delay) // 1000)
-                )
+                w = VhdlSerializer.WaitStm(WaitStm(int(delay) // 1000))
+                hwProc.bodyFile.write(w)
+                hwProc.bodyFile.write(";\n")
                 hwProc.actualTime = nowTime
         
         try:
@@ -111,25 +142,62 @@ class HdlSimConfigVhdlTestbench(HdlSimConfig):
         except AttributeError:
             pass
         
-        hwProc.statements.extend(
-            connect(nextVal, hwProc.driverFor)
-        )
+        hwProc.bodyFile.write(assignmentAsVhdl(nextVal, hwProc.driverFor))
+        hwProc.bodyFile.write(";\n")
         
+    def _dumpProcess(self, proc, scope, dumpFile):
+        """
+        Write driver process rendered by VhdlSerializer with body from its
+        temporary file inserted in front of final wait statement
+        """
+        p = VhdlSerializer.formater(VhdlSerializer.HWProcess(proc, scope))
+        lines = p.split("\n")
+        # process is rendered in architecture
+        lines = ["    " + l if l else l for l in lines]
+        waitStm = VhdlSerializer.WaitStm(WaitStm(None)) + ";"
+        waitIndex = max(i for i, l in enumerate(lines) if l.strip() == waitStm)
+        waitLine = lines[waitIndex]
+        indent = waitLine[:len(waitLine) - len(waitLine.lstrip())]
         
+        dumpFile.write("\n".join(lines[:waitIndex]).rstrip())
+        dumpFile.write("\n")
+        body = proc.bodyFile
+        body.seek(0)
+        for line in body:
+            dumpFile.write(indent)
+            dumpFile.write(line)
+        # simulation may continue and append next statements
+        body.seek(0, 2)
+        dumpFile.write("\n".join(lines[waitIndex:]))
+        dumpFile.write("\n")
         
     def dump(self, dumpFile=sys.stdout):
-        for proc in self.tbArch.processes:
-            proc.statements.append(WaitStm(None))
-        
+        """
+        Write testbench, can be called repeatedly, f.e. during simulation
+        """
         hasToBeOpened = isinstance(dumpFile, str)
         if hasToBeOpened:
             _dumpFile = open(dumpFile, 'w')
         else:
             _dumpFile = dumpFile
         
-        sc = VhdlSerializer.getBaseNameScope()
-        _dumpFile.write(VhdlSerializer.formater(VhdlSerializer.Entity(self.tbEnt, sc)))
-        _dumpFile.write(VhdlSerializer.formater(VhdlSerializer.Architecture(self.tbArch, sc)))
-        
-        
-        
+        try:
+            procs = self.tbArch.processes
+            # processes are rendered separately, because their bodies are in files
+            self.tbArch.processes = []
+            
+            sc = VhdlSerializer.getBaseNameScope()
+            _dumpFile.write(VhdlSerializer.formater(VhdlSerializer.Entity(self.tbEnt, sc)))
+            _dumpFile.write("\n")
+            arch = VhdlSerializer.formater(VhdlSerializer.Architecture(self.tbArch, sc))
+            
+            archEnd = arch.rfind("END ARCHITECTURE")
+            _dumpFile.write(arch[:archEnd])
+            for p in procs:
+                self._dumpProcess(p, sc, _dumpFile)
+            _dumpFile.write(arch[archEnd:])
+            _dumpFile.write("\n")
+            self.tbArch.processes = procs
+        finally:
+            if hasToBeOpened:
+                _dumpFile.close()
@@ -0,0 +1,226 @@
+from random import Random
+
+import numpy as np
+
+from hdl_toolkit.simulator.dataQueue import iterNdarray, toDataQueue
+from hdl_toolkit.simulator.shortcuts import onRisingEdge
+
+
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+
+def _fitsInt64(low, high):
+    return _INT64_MIN <= low and high <= _INT64_MAX
+
+
+def _pyRng(rng):
+    """
+    python Random derived from numpy generator (for values wider than 64b)
+    """
+    return Random(int(rng.integers(_INT64_MAX, endpoint=True)))
+
+
+class Distribution():
+    """
+    Base class of distributions of constrained random engine
+    """
+    def sample(self, rng, n):
+        """
+        @param rng: numpy.random.Generator
+        @return: NumPy array of at least n items
+        """
+        raise NotImplementedError()
+
+
+class Uniform(Distribution):
+    """
+    Uniform distribution of integers from range low..high (inclusive),
+    ranges which do not fit to int64 are sampled by python Random
+    """
+    def __init__(self, low, high):
+        self.low = low
+        self.high = high
+
+    def sample(self, rng, n):
+        low, high = self.low, self.high
+        if _fitsInt64(low, high):
+            return rng.integers(low, high, size=n, endpoint=True)
+        r = _pyRng(rng)
+        return np.array([r.randrange(low, high + 1) for _ in range(n)], dtype=object)
+
+
+class Weighted(Distribution):
+    """
+    Weighted choice from list of values
+    """
+    def __init__(self, values, weights=None):
+        self.values = np.asarray(values)
+        if weights is None:
+            self.p = None
+        else:
+            w = np.asarray(weights, dtype=np.float64)
+            self.p = w / w.sum()
+
+    def sample(self, rng, n):
+        return rng.choice(self.values, size=n, p=self.p)
+
+
+class WeightedRanges(Distribution):
+    """
+    Weighted choice of range and uniform choice of value from it
+
+    @param ranges: list of tuples (low, high, weight), high is inclusive
+    """
+    def __init__(self, ranges):
+        self.ranges = [(r[0], r[1]) for r in ranges]
+        self.wide = not all(_fitsInt64(l, h) for l, h in self.ranges)
+        if not self.wide:
+            self.low = np.array([r[0] for r in ranges], dtype=np.int64)
+            self.high = np.array([r[1] for r in ranges], dtype=np.int64)
+        w = np.array([r[2] for r in ranges], dtype=np.float64)
+        self.p = w / w.sum()
+
+    def sample(self, rng, n):
+        r = rng.choice(len(self.p), size=n, p=self.p)
+        if not self.wide:
+            return rng.integers(self.low[r], self.high[r], endpoint=True)
+        pyRng = _pyRng(rng)
+        ranges = self.ranges
+        return np.array([pyRng.randrange(ranges[i][0], ranges[i][1] + 1) for i in r.tolist()],
+                        dtype=object)
+
+
+class Bernoulli(Distribution):
+    """
+    Enable pattern where every cycle is enabled with probability p
+    """
+    def __init__(self, p=0.5):
+        self.p = p
+
+    def sample(self, rng, n):
+        return rng.random(n) < self.p
+
+
+class Bursts(Distribution):
+    """
+    Enable pattern made of bursts of enabled cycles separated by gaps
+    (backpressure/stall periods), lengths of bursts and gaps are uniformly
+    distributed in specified ranges (inclusive)
+    """
+    def __init__(self, burstLen=(1, 8), gapLen=(0, 4)):
+        self.burstLen = burstLen
+        self.gapLen = gapLen
+
+    def sample(self, rng, n):
+        # expected length of one burst + gap pair
+        avg = (sum(self.burstLen) + sum(self.gapLen)) / 2
+        pairs = int(n / max(avg, 1)) + 1
+        parts = []
+        size = 0
+        while size < n:
+            lens = np.empty(pairs * 2, dtype=np.int64)
+            lens[0::2] = rng.integers(self.burstLen[0], self.burstLen[1],
+                                      size=pairs, endpoint=True)
+            lens[1::2] = rng.integers(self.gapLen[0], self.gapLen[1],
+                                      size=pairs, endpoint=True)
+            vals = np.zeros(pairs * 2, dtype=np.bool_)
+            vals[0::2] = True
+            p = np.repeat(vals, lens)
+            parts.append(p)
+            size += len(p)
+        return np.concatenate(parts)
+
+
+class ConstrainedRandom():
+    """
+    Seedable constrained random engine for simulation agents
+
+    Values and enable patterns are generated in NumPy batches. Every stream
+    has its own generator derived from seed and stream index,
+    so adding new stream does not change values of other streams.
+
+    Enable of all agents which share clock signal is updated by single
+    callback on rising edge of the clock (instead of process per agent).
+    Order of this callback and callbacks of agents on the same edge
+    is given by order in which their processes were added to simulation.
+    """
+    def __init__(self, seed=317, batchSize=4096):
+        self.seed = seed
+        self.batchSize = batchSize
+        self._streamCnt = 0
+        # {clk: list of (agent, enable iterator)}
+        self._enableGroups = {}
+
+    def _rng(self):
+        rng = np.random.default_rng([self.seed, self._streamCnt])
+        self._streamCnt += 1
+        return rng
+
+    def batches(self, dist, n=None):
+        """
+        Generator of NumPy arrays sampled from distribution
+
+        @param n: total number of items (infinite if None)
+        """
+        rng = self._rng()
+        batchSize = self.batchSize
+        while n is None or n > 0:
+            if n is None:
+                size = batchSize
+            else:
+                size = min(batchSize, n)
+            b = dist.sample(rng, size)
+            if n is not None:
+                b = b[:n]
+                n -= len(b)
+            yield b
+
+    def stream(self, dist, n=None):
+        """
+        Generator of python values sampled from distribution
+        (can be assigned to agent.data by toDataQueue(), it is consumed lazily)
+        """
+        for b in self.batches(dist, n):
+            yield from iterNdarray(b)
+
+    def array(self, dist, n):
+        """
+        @return: NumPy array of n values sampled from distribution
+        """
+        return np.concatenate(list(self.batches(dist, n)))
+
+    def driveData(self, agent, dist, n=None):
+        """
+        Append n random values to data of driver agent
+        """
+        agent.data = toDataQueue(agent.data)
+        agent.data.extendLazy(self.stream(dist, n))
+
+    def randomizeEnable(self, agent, pattern=None, clk=None):
+        """
+        Drive enable of agent by random pattern
+
+        @param pattern: Distribution of bool values, Bernoulli(0.5) by default
+        @param clk: clock signal, clk of agent by default
+        @return: simulation process which has to be added to simulation
+                 if this is first agent with this clock, else None
+        """
+        if pattern is None:
+            pattern = Bernoulli(0.5)
+        if clk is None:
+            clk = agent.clk
+
+        en = self.stream(pattern)
+        agent.enable = next(en)
+        try:
+            self._enableGroups[clk].append((agent, en))
+            return None
+        except KeyError:
+            group = self._enableGroups[clk] = [(agent, en)]
+
+        def updateEnables(s):
+            for agent, en in group:
+                agent.enable = next(en)
+
+        return onRisingEdge(clk, updateEnables)
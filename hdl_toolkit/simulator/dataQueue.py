@@ -0,0 +1,103 @@
+from collections import deque
+
+import numpy as np
+
+
+def iterNdarray(arr, chunkSize=4096):
+    """
+    Iterate NumPy array as python objects (numpy integers are not accepted
+    by fromPy of hdl types), array is converted by chunks
+    """
+    for i in range(0, len(arr), chunkSize):
+        yield from arr[i:i + chunkSize].tolist()
+
+
+class DataQueue(deque):
+    """
+    Deque of data for simulation agents
+
+    Iterables added by extendLazy() (generators, NumPy arrays) are consumed
+    item by item when driver asks for next item, so whole stimulus
+    does not have to be materialized as python list.
+
+    @ivar _sources: deque of iterators which are consumed after items in this deque
+    """
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self._sources = deque()
+
+    def extendLazy(self, iterable):
+        """
+        Append all items from iterable without consuming it now
+        """
+        if isinstance(iterable, np.ndarray):
+            iterable = iterNdarray(iterable)
+        self._sources.append(iter(iterable))
+
+    def _fetch(self):
+        """
+        Move one item from lazy sources to this deque
+
+        @return: True if item was fetched
+        """
+        sources = self._sources
+        while sources:
+            try:
+                deque.append(self, next(sources[0]))
+                return True
+            except StopIteration:
+                sources.popleft()
+        return False
+
+    def append(self, item):
+        if self._sources:
+            # keep order behind lazy items
+            self._sources.append(iter((item,)))
+        else:
+            deque.append(self, item)
+
+    def popleft(self):
+        if not deque.__len__(self):
+            self._fetch()
+        return deque.popleft(self)
+
+    def __bool__(self):
+        return deque.__len__(self) > 0 or self._fetch()
+
+    def __len__(self):
+        sources = self._sources
+        while sources:
+            deque.extend(self, sources.popleft())
+        return deque.__len__(self)
+
+    def __iter__(self):
+        yield from deque.__iter__(self)
+        # items are fetched one by one, so infinite sources can be iterated
+        while self._fetch():
+            yield deque.__getitem__(self, -1)
+
+
+def toDataQueue(data):
+    """
+    Convert data of agent to DataQueue, lists are copied,
+    other iterables (generators, NumPy arrays) are consumed lazily
+    """
+    if isinstance(data, DataQueue):
+        return data
+    elif isinstance(data, (list, tuple, deque)):
+        return DataQueue(data)
+    else:
+        q = DataQueue()
+        q.extendLazy(data)
+        return q
+
+
+def popleft(queue):
+    """
+    Pop first item from data of agent, data can be also plain list
+    assigned by user (its pop(0) is O(n))
+    """
+    try:
+        return queue.popleft()
+    except AttributeError:
+        return queue.pop(0)
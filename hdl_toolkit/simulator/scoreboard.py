@@ -0,0 +1,140 @@
+from collections import deque
+
+from hdl_toolkit.hdlObjects.value import Value
+from hdl_toolkit.simulator.agentConnector import valToInt
+from hdl_toolkit.simulator.exceptions import SimException
+
+
+class ScoreboardMismatch(SimException):
+    """Received transaction does not match expected value"""
+    pass
+
+
+class Mismatch():
+    """
+    @ivar index: index of transaction on monitored interface
+    @ivar time: simulation time when transaction was received
+    @ivar expected: expected value (int, None = invalid)
+    @ivar received: received value (int, None = invalid)
+    """
+    __slots__ = ["index", "time", "expected", "received"]
+
+    def __init__(self, index, time, expected, received):
+        self.index = index
+        self.time = time
+        self.expected = expected
+        self.received = received
+
+    def __repr__(self):
+        return "<Mismatch #%d at %r expected %r received %r>" % (
+            self.index, self.time, self.expected, self.received)
+
+
+_NOT_SPECIFIED = object()
+
+
+class Scoreboard():
+    """
+    Compares transactions collected by monitor of agent against expected
+    values while simulation is running, received data are not stored,
+    only last mismatchWindow mismatches are kept
+
+    @ivar received: number of received transactions
+    @ivar matched: number of transactions which matched expected value
+    @ivar mismatched: number of transactions which did not match
+    @ivar unexpected: number of transactions received after expected values were exhausted
+    @ivar mismatches: deque of last Mismatch objects
+    """
+    def __init__(self, agent, expected=None, refModel=None, mismatchWindow=16,
+                 stopOnError=False):
+        """
+        @param agent: monitor agent which received data should be checked
+        @param expected: iterable of expected values (int or Value, None = invalid),
+                         it is consumed lazily
+        @param refModel: function (index, received value as int) -> expected value,
+                         used if expected is not specified
+        @param mismatchWindow: maximum number of stored mismatches
+        @param stopOnError: raise ScoreboardMismatch (which stops simulation)
+                            on first mismatch
+        """
+        assert (expected is None) != (refModel is None), \
+            "Exactly one of expected, refModel has to be specified"
+        self.agent = agent
+        if expected is None:
+            self._expected = None
+        else:
+            self._expected = iter(expected)
+        self.refModel = refModel
+        self.stopOnError = stopOnError
+
+        self.received = 0
+        self.matched = 0
+        self.mismatched = 0
+        self.unexpected = 0
+        self.mismatches = deque(maxlen=mismatchWindow)
+
+        agent.scoreboard = self
+
+    def _nextExpected(self, index, received):
+        if self._expected is None:
+            return self.refModel(index, received)
+
+        e = next(self._expected, _NOT_SPECIFIED)
+        if isinstance(e, Value):
+            e = valToInt(e)
+        return e
+
+    def check(self, s, d):
+        """
+        Called by agent for every collected value
+        """
+        index = self.received
+        self.received += 1
+        received = valToInt(d)
+        expected = self._nextExpected(index, received)
+        if expected is _NOT_SPECIFIED:
+            self.unexpected += 1
+            expected = None
+        elif expected == received:
+            self.matched += 1
+            return
+        else:
+            self.mismatched += 1
+
+        m = Mismatch(index, s.now, expected, received)
+        self.mismatches.append(m)
+        if self.stopOnError:
+            raise ScoreboardMismatch("%r on %r" % (m, self.agent.intf))
+
+    def missing(self):
+        """
+        @return: True if there are expected values which were not received
+                 (consumes one item from expected iterator)
+        """
+        if self._expected is None:
+            return False
+        e = next(self._expected, _NOT_SPECIFIED)
+        if e is _NOT_SPECIFIED:
+            return False
+        self._expected = _prepend(e, self._expected)
+        return True
+
+    def isOk(self):
+        return not self.mismatched and not self.unexpected and not self.missing()
+
+    def report(self):
+        """
+        @return: human readable report of scoreboard state
+        """
+        lines = ["%r: received %d, matched %d, mismatched %d, unexpected %d%s" % (
+                    self.agent.intf, self.received, self.matched,
+                    self.mismatched, self.unexpected,
+                    ", some expected values were not received" if self.missing() else "")]
+        for m in self.mismatches:
+            lines.append("    %r" % m)
+        return "\n".join(lines)
+
+
+def _prepend(item, iterator):
+    yield item
+    yield from iterator
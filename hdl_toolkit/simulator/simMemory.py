@@ -0,0 +1,190 @@
+import numpy as np
+
+from hdl_toolkit.simulator.transactionRecorder import columnDtypeFor
+
+
+class SimMemory():
+    """
+    Memory for simulation agents, words are stored in NumPy array and
+    validity of every word is stored in separate boolean array
+
+    @ivar size: number of words
+    @ivar width: width of word in bits
+    """
+    def __init__(self, size, width):
+        self.size = size
+        self.width = width
+        self.dtype = columnDtypeFor(width)
+
+    def _checkRange(self, offset, size):
+        if offset < 0 or offset + size > self.size:
+            raise IndexError("Range %d:%d is out of memory of size %d" % (offset, offset + size, self.size))
+
+    def read(self, addr):
+        """
+        @return: tuple (value, vld)
+        """
+        raise NotImplementedError()
+
+    def write(self, addr, val, vld=True):
+        raise NotImplementedError()
+
+    def preload(self, data, offset=0, vld=None):
+        """
+        Write array of words to memory starting at offset
+
+        @param vld: optional boolean array, all words are valid if not specified
+        """
+        raise NotImplementedError()
+
+    def dump(self, offset=0, size=None):
+        """
+        @return: tuple (values, vld) NumPy arrays for memory range
+        """
+        raise NotImplementedError()
+
+    def loadFile(self, fileName, offset=0):
+        """
+        Preload memory from .npz file produced by saveFile (values and validity),
+        .npy file or from raw binary file (raw file has to contain words
+        in native byte order)
+        """
+        vld = None
+        if fileName.endswith(".npz"):
+            with np.load(fileName, allow_pickle=self.dtype is object) as d:
+                data = d["val"]
+                vld = d["vld"]
+        elif fileName.endswith(".npy"):
+            data = np.load(fileName, allow_pickle=self.dtype is object)
+        else:
+            if self.dtype is object:
+                raise NotImplementedError("Raw files are not supported for words wider than 64b")
+            data = np.fromfile(fileName, dtype=self.dtype)
+        self.preload(data, offset=offset, vld=vld)
+
+    def saveFile(self, fileName, offset=0, size=None):
+        """
+        Save memory range as .npz file with arrays val and vld
+        (".npz" is appended to fileName if it does not end with it)
+        """
+        val, vld = self.dump(offset, size)
+        np.savez_compressed(fileName, val=val, vld=vld)
+
+
+class DenseSimMemory(SimMemory):
+    """
+    SimMemory where whole address space is allocated at once
+    """
+    def __init__(self, size, width):
+        super().__init__(size, width)
+        self.val = np.zeros(size, dtype=self.dtype)
+        self.vld = np.zeros(size, dtype=np.bool_)
+
+    def read(self, addr):
+        return self.val[addr], self.vld[addr]
+
+    def write(self, addr, val, vld=True):
+        self.val[addr] = val
+        self.vld[addr] = vld
+
+    def preload(self, data, offset=0, vld=None):
+        size = len(data)
+        self._checkRange(offset, size)
+        self.val[offset:offset + size] = data
+        if vld is None:
+            self.vld[offset:offset + size] = True
+        else:
+            self.vld[offset:offset + size] = vld
+
+    def dump(self, offset=0, size=None):
+        if size is None:
+            size = self.size - offset
+        self._checkRange(offset, size)
+        return (self.val[offset:offset + size].copy(),
+                self.vld[offset:offset + size].copy())
+
+
+class SparseSimMemory(SimMemory):
+    """
+    SimMemory for huge address spaces, memory is allocated by pages
+    on first write to page
+
+    @ivar pages: dict {page index: (values array, vld array)}
+    """
+    def __init__(self, size, width, pageSize=4096):
+        super().__init__(size, width)
+        self.pageSize = pageSize
+        self.pages = {}
+
+    def _page(self, pageIndex):
+        try:
+            return self.pages[pageIndex]
+        except KeyError:
+            p = self.pages[pageIndex] = (np.zeros(self.pageSize, dtype=self.dtype),
+                                         np.zeros(self.pageSize, dtype=np.bool_))
+            return p
+
+    def read(self, addr):
+        pi, i = divmod(addr, self.pageSize)
+        try:
+            val, vld = self.pages[pi]
+        except KeyError:
+            return 0, False
+        return val[i], vld[i]
+
+    def write(self, addr, val, vld=True):
+        pi, i = divmod(addr, self.pageSize)
+        pVal, pVld = self._page(pi)
+        pVal[i] = val
+        pVld[i] = vld
+
+    def _chunks(self, offset, size):
+        """
+        @return: generator of tuples (page index, index in page, index in data, size)
+        """
+        end = offset + size
+        addr = offset
+        while addr < end:
+            pi, i = divmod(addr, self.pageSize)
+            cnt = min(self.pageSize - i, end - addr)
+            yield pi, i, addr - offset, cnt
+            addr += cnt
+
+    def preload(self, data, offset=0, vld=None):
+        size = len(data)
+        self._checkRange(offset, size)
+        for pi, i, di, cnt in self._chunks(offset, size):
+            pVal, pVld = self._page(pi)
+            pVal[i:i + cnt] = data[di:di + cnt]
+            if vld is None:
+                pVld[i:i + cnt] = True
+            else:
+                pVld[i:i + cnt] = vld[di:di + cnt]
+
+    def dump(self, offset=0, size=None):
+        if size is None:
+            size = self.size - offset
+        self._checkRange(offset, size)
+        val = np.zeros(size, dtype=self.dtype)
+        vld = np.zeros(size, dtype=np.bool_)
+        for pi, i, di, cnt in self._chunks(offset, size):
+            try:
+                pVal, pVld = self.pages[pi]
+            except KeyError:
+                continue
+            val[di:di + cnt] = pVal[i:i + cnt]
+            vld[di:di + cnt] = pVld[i:i + cnt]
+        return val, vld
+
+
+def simMemory(size, width, sparse=None, sparseThreshold=1 << 22):
+    """
+    Create SimMemory, sparse memory is used for address spaces bigger than
+    sparseThreshold words if sparse is not specified
+    """
+    if sparse is None:
+        sparse = size > sparseThreshold
+    if sparse:
+        return SparseSimMemory(size, width)
+    else:
+        return DenseSimMemory(size, width)
@@ -7,7 +7,7 @@ class SimSignal(SignalItem):
     @ivar _writeCallbacks: list of callback functions(signal, simulator) which is called
                            when new (changed) value is written to this signal
     """
-    __slots__ = ["name", "_val", "_oldVal", "_writeCallbacks",
+    __slots__ = ["hidden", "_writeCallbacks",
                  "simSensProcs", "simRisingSensProcs", "simFallingSensProcs"]
     def __init__(self, ctx, name, dtype, defaultVal=None):
         ctx.signals.add(self)
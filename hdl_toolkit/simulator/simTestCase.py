@@ -1,13 +1,23 @@
+import io
 import os
 import unittest
 
+import numpy as np
+
 from hdl_toolkit.hdlObjects.value import Value
-from hdl_toolkit.simulator.agentConnector import valToInt
+from hdl_toolkit.simulator.agentConnector import valToInt, \
+    valuesToArrays, agArrays
+from hdl_toolkit.simulator.agentStats import AgentStats, LatencyStats
 from hdl_toolkit.simulator.hdlSimulator import HdlSimulator
 from hdl_toolkit.simulator.simSignal import SimSignal
 from hdl_toolkit.simulator.vcdHdlSimConfig import VcdHdlSimConfig
 from hdl_toolkit.simulator.configVhdlTestbench import HdlSimConfigVhdlTestbench
+from hdl_toolkit.simulator.constrainedRandom import ConstrainedRandom
+from hdl_toolkit.simulator.scoreboard import Scoreboard
+from hdl_toolkit.simulator.stimulusReplay import StimulusRecord, \
+    StimulusRecordingHdlSimulator, StimulusReplayHdlSimulator
 from hdl_toolkit.simulator.utils import agent_randomize
+from hdl_toolkit.simulator.vcdDiff import vcdDiff
 
 def allValuesToInts(sequenceOrVal):
     if isinstance(sequenceOrVal, Value):
@@ -20,6 +30,25 @@ def allValuesToInts(sequenceOrVal):
             l.append(allValuesToInts(i))
         return l
 
+def expectedToArrays(expected):
+    """
+    Convert sequence of expected ints (None = invalid) to NumPy arrays
+    
+    @return: tuple (values array, validity array)
+    """
+    if isinstance(expected, np.ndarray):
+        return expected, np.ones(len(expected), dtype=np.bool_)
+    expected = list(expected)
+    vld = np.array([e is not None for e in expected], dtype=np.bool_)
+    vals = [0 if e is None else e for e in expected]
+    signed = any(e < 0 for e in vals)
+    try:
+        vals = np.array(vals, dtype=np.int64 if signed else np.uint64)
+    except OverflowError:
+        # too wide or negative values
+        vals = np.array(vals, dtype=object)
+    return vals, vld
+
 class SimTestCase(unittest.TestCase):
     """
     This is TestCase class contains methods which are usually used during
@@ -35,22 +64,55 @@ class SimTestCase(unittest.TestCase):
         className, testName = self.id().split(".")[-2:]
         return "%s_%s" % (className, testName)
     
+    def getVcdFileName(self):
+        return "tmp/" + self.getTestName() + ".vcd"
+
     def doSim(self, time):
-        outputFileName = "tmp/" + self.getTestName() + ".vcd"
+        return self._doSim(time, HdlSimulator(), self.procs)
+    
+    def _doSim(self, time, sim, procs):
+        outputFileName = self.getVcdFileName()
         d = os.path.dirname(outputFileName)
         if d:
             os.makedirs(d, exist_ok=True)
         with open(outputFileName, 'w') as outputFile:
-            # return _simUnitVcd(simModel, stimulFunctions, outputFile=f, time=time) 
-            sim = HdlSimulator()
-
             # configure simulator to log in vcd
             sim.config = VcdHdlSimConfig(outputFile)
             
             # run simulation, stimul processes are register after initial initialization
-            sim.simUnit(self.model, time=time, extraProcesses=self.procs) 
+            sim.simUnit(self.model, time=time, extraProcesses=procs) 
             return sim
     
+    def getStimulusFileName(self):
+        return "tmp/" + self.getTestName() + "_stimulus.npz"
+    
+    def doSimRecordStimulus(self, time, stimulusFile=None):
+        """
+        doSim which also saves all values written by agents
+        (and clock generators) to stimulusFile
+        """
+        if stimulusFile is None:
+            stimulusFile = self.getStimulusFileName()
+        sim = self._doSim(time, StimulusRecordingHdlSimulator(), self.procs)
+        sim.stimulus.toNpz(stimulusFile)
+        return sim
+    
+    def doSimReplayStimulus(self, time, stimulusFile=None, monitors=()):
+        """
+        Run simulation driven only by stimulus saved by doSimRecordStimulus,
+        agents are not used
+        
+        @param monitors: simulation processes which should run together with replay
+                         (e.g. agentMonitors(unit)), their writes to replayed signals
+                         are ignored
+        """
+        if stimulusFile is None:
+            stimulusFile = self.getStimulusFileName()
+        stimulus = StimulusRecord.fromNpz(stimulusFile)
+        procs = [stimulus.replayProcess(self.model)]
+        procs.extend(monitors)
+        return self._doSim(time, StimulusReplayHdlSimulator(), procs)
+    
     def dumpHdlTestbench(self, time, file=None):
         if file:
             outputFileName = file
@@ -81,6 +143,36 @@ class SimTestCase(unittest.TestCase):
         
         return unittest.TestCase.assertEqual(self, first, second, msg=msg)
     
+    def assertValArrayEqual(self, values, expected, msg=None):
+        """
+        Compare whole sequence of values with expected values at once
+        
+        @param values: interface (data collected by its agent are used),
+                       sequence of values or tuple (values array, validity array)
+        @param expected: sequence of ints (None = invalid) or NumPy array
+        """
+        if isinstance(values, tuple) and len(values) == 2 \
+                and isinstance(values[0], np.ndarray):
+            vals, vld = values
+        elif hasattr(values, "_ag"):
+            vals, vld = agArrays(values)
+        else:
+            vals, vld = valuesToArrays(values)
+        eVals, eVld = expectedToArrays(expected)
+        
+        if len(vals) != len(eVals):
+            self.fail(msg or "Lengths differ: %d != %d" % (len(vals), len(eVals)))
+        
+        diff = (vld != eVld) | (vld & (vals != eVals))
+        if diff.any():
+            idx = np.flatnonzero(diff)
+            lines = ["%d items differ, first:" % len(idx)]
+            for i in idx[:10]:
+                lines.append("    [%d] %r != %r" % (i,
+                             int(vals[i]) if vld[i] else None,
+                             int(eVals[i]) if eVld[i] else None))
+            self.fail(msg or "\n".join(lines))
+
     def assertValSequenceEqual(self, seq1, seq2, msg=None, seq_type=None):
         """
         @param seq1: can contain instance of values or nested list of them
@@ -90,5 +182,79 @@ class SimTestCase(unittest.TestCase):
         unittest.TestCase.assertSequenceEqual(self, seq1, seq2, msg, seq_type)
         
 
+    def assertVcdEqual(self, referenceVcd, maxDivergences=10, signals=None):
+        """
+        Compare vcd from last doSim with reference vcd file
+        (signals are matched by hierarchical name, header is ignored)
+        """
+        res = vcdDiff(self.getVcdFileName(), referenceVcd,
+                      maxDivergences=maxDivergences, signals=signals)
+        if not res.isEqual():
+            report = io.StringIO()
+            res.report(report)
+            self.fail("vcd differs from %s:\n%s" % (referenceVcd, report.getvalue()))
+
+    def addScoreboard(self, intf, expected=None, refModel=None,
+                      mismatchWindow=16, stopOnError=False):
+        """
+        Check data received by agent of interface while simulation is running
+        (received data are not stored in agent.data)
+        
+        @return: Scoreboard
+        """
+        return Scoreboard(intf._ag, expected=expected, refModel=refModel,
+                          mismatchWindow=mismatchWindow, stopOnError=stopOnError)
+    
+    def assertScoreboardOk(self, scoreboard, msg=None):
+        if not scoreboard.isOk():
+            self.fail(msg or scoreboard.report())
+
+    def addStats(self, intf):
+        """
+        Collect cycle statistics (throughput, backpressure) of interface
+        
+        @return: AgentStats
+        """
+        st = AgentStats(intf._ag)
+        self.procs.append(st.getProcess())
+        return st
+    
+    def addLatencyStats(self, reqIntf, respIntf):
+        """
+        Collect latency between transfers on reqIntf and respIntf
+        (statistics of interfaces are added if they are not present)
+        
+        @return: LatencyStats
+        """
+        statsOfIntf = []
+        for intf in (reqIntf, respIntf):
+            st = intf._ag.stats
+            if st is None:
+                st = self.addStats(intf)
+            statsOfIntf.append(st)
+        return LatencyStats(*statsOfIntf)
+
     def randomize(self, intf):
         self.procs.append(agent_randomize(intf._ag))
+
+    def randomizeConstrained(self, intf, pattern=None):
+        """
+        Drive enable of agent of interface by random pattern generated
+        by self.randomEngine (ConstrainedRandom), agents without clock
+        are randomized by agent_randomize
+        
+        @param pattern: Distribution of enable values (Bernoulli(0.5) by default)
+        """
+        ag = intf._ag
+        if getattr(ag, "clk", None) is None:
+            self.randomize(intf)
+            return
+        
+        try:
+            engine = self.randomEngine
+        except AttributeError:
+            engine = self.randomEngine = ConstrainedRandom()
+        
+        p = engine.randomizeEnable(ag, pattern=pattern)
+        if p is not None:
+            self.procs.append(p)
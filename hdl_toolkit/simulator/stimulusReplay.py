@@ -0,0 +1,241 @@
+import numpy as np
+
+from hdl_toolkit.hdlObjects.specialValues import INTF_DIRECTION
+from hdl_toolkit.simulator.hdlSimulator import HdlSimulator
+from hdl_toolkit.simulator.transactionRecorder import GrowableColumn
+from hdl_toolkit.synthesizer.interfaceLevel.mainBases import InterfaceBase
+from hdl_toolkit.synthesizer.param import evalParam
+
+
+class StimulusRecord():
+    """
+    Changes written by simulation processes (agents, clock generators)
+    to signals of simulation model
+
+    Changes are stored in single table of columns time, phase, signal id, val, vldMask
+    (in order of writes, so changes in the same time are replayed in the same order),
+    changes which do not change value of signal are not stored.
+    Phase is number of updateComplete events which were triggered in time
+    of change before the change was written (agents are writing after
+    updateComplete on clock edge), replay writes the change in the same phase.
+
+    @ivar signalNames: list of names of signals indexed by signal id
+    """
+    def __init__(self, capacity=1024):
+        self.signalNames = []
+        self._sigIds = {}
+        self._last = []
+        self._time = GrowableColumn(np.int64, capacity)
+        self._phase = GrowableColumn(np.int32, capacity)
+        self._sigId = GrowableColumn(np.int32, capacity)
+        self._val = GrowableColumn(np.uint64, capacity)
+        self._vldMask = GrowableColumn(np.uint64, capacity)
+
+    def _toObjectColumns(self):
+        for c in (self._val, self._vldMask):
+            c._data = c._data.astype(object)
+
+    def record(self, time, sig, v, phase=0):
+        """
+        Store value v written to sig in time
+
+        @param phase: number of updateComplete events in time before this write
+        """
+        try:
+            i = self._sigIds[sig]
+        except KeyError:
+            i = self._sigIds[sig] = len(self.signalNames)
+            self.signalNames.append(sig.name)
+            self._last.append(None)
+
+        val = v.val
+        if val is None:
+            val = 0
+        vldMask = v.vldMask
+        last = self._last[i]
+        if last is not None and last[0] == val and last[1] == vldMask:
+            return
+        self._last[i] = (val, vldMask)
+
+        if self._val._data.dtype != object and (
+                not isinstance(val, int) or not isinstance(vldMask, int)
+                or val < 0 or val.bit_length() > 64 or vldMask.bit_length() > 64):
+            self._toObjectColumns()
+
+        self._time.append(time)
+        self._phase.append(phase)
+        self._sigId.append(i)
+        self._val.append(val)
+        self._vldMask.append(vldMask)
+
+    def __len__(self):
+        return len(self._time)
+
+    def changesOf(self, signalName):
+        """
+        @return: tuple (time, val, vldMask) arrays with changes of signal
+        """
+        i = self.signalNames.index(signalName)
+        sel = self._sigId.array == i
+        return (self._time.array[sel],
+                self._val.array[sel],
+                self._vldMask.array[sel])
+
+    def toNpz(self, fileName, compressed=True):
+        save = np.savez_compressed if compressed else np.savez
+        save(fileName,
+             signalNames=np.array(self.signalNames, dtype=object),
+             time=self._time.array,
+             phase=self._phase.array,
+             sigId=self._sigId.array,
+             val=self._val.array,
+             vldMask=self._vldMask.array)
+
+    @classmethod
+    def fromNpz(cls, fileName):
+        with np.load(fileName, allow_pickle=True) as d:
+            time = d["time"]
+            self = cls(capacity=len(time))
+            self.signalNames = list(d["signalNames"])
+            if "phase" in d:
+                phase = d["phase"]
+            else:
+                phase = np.zeros(len(time), dtype=np.int32)
+            for col, arr in ((self._time, time),
+                             (self._phase, phase),
+                             (self._sigId, d["sigId"]),
+                             (self._val, d["val"]),
+                             (self._vldMask, d["vldMask"])):
+                col._data = np.array(arr, dtype=arr.dtype)
+                col._size = len(arr)
+        return self
+
+    def replayProcess(self, model):
+        """
+        Simulation process which writes recorded changes to signals
+        of simulation model (signals are matched by name),
+        if it runs in StimulusReplayHdlSimulator writes of other processes
+        to replayed signals are ignored and changes are written in the same
+        phase of time step as they were recorded (in other simulators
+        all changes are written on start of time step)
+        """
+        signals = {}
+        for s in model._cntx.signals:
+            signals[s.name] = s
+        try:
+            sigs = [signals[n] for n in self.signalNames]
+        except KeyError as e:
+            raise KeyError("Signal %s is not present in model %s" % (str(e), model._name))
+        valCls = [s._dtype.getValueCls() for s in sigs]
+
+        time = self._time.array.tolist()
+        phase = self._phase.array.tolist()
+        sigId = self._sigId.array.tolist()
+        val = self._val.array.tolist()
+        vldMask = self._vldMask.array.tolist()
+
+        def replay(s):
+            ignoredWrites = getattr(s, "ignoredWrites", None)
+            if ignoredWrites is not None:
+                ignoredWrites.update(sigs)
+            write = HdlSimulator.write
+            deltaPhase = getattr(s, "deltaPhase", None)
+            for t, p, i, v, m in zip(time, phase, sigId, val, vldMask):
+                if t > s.now:
+                    yield s.wait(t - s.now)
+                if deltaPhase is not None:
+                    while deltaPhase() < p and s.now == t:
+                        yield s.updateComplete
+                sig = sigs[i]
+                write(s, valCls[i](v, sig._dtype, m), sig)
+
+        return replay
+
+
+class DeltaPhaseHdlSimulator(HdlSimulator):
+    """
+    HdlSimulator which counts updateComplete events in actual time
+    """
+    def __init__(self, config=None):
+        super().__init__(config=config)
+        self._phaseTime = None
+        self._phase = 0
+
+    def applyValues(self, ev):
+        updateComplete = self.updateComplete
+        super().applyValues(ev)
+        if self.updateComplete is not updateComplete:
+            # updateComplete was triggered
+            if self._phaseTime != self.now:
+                self._phaseTime = self.now
+                self._phase = 0
+            self._phase += 1
+
+    def deltaPhase(self):
+        """
+        @return: number of updateComplete events which were triggered in actual time
+        """
+        if self._phaseTime == self.now:
+            return self._phase
+        return 0
+
+
+class StimulusRecordingHdlSimulator(DeltaPhaseHdlSimulator):
+    """
+    HdlSimulator which records all values written by simulation processes
+    to StimulusRecord
+
+    @ivar stimulus: StimulusRecord with recorded writes
+    """
+    def __init__(self, config=None):
+        super().__init__(config=config)
+        self.stimulus = StimulusRecord()
+
+    def write(self, val, sig):
+        super().write(val, sig)
+        if isinstance(sig, InterfaceBase):
+            sig = sig._sigInside
+        self.stimulus.record(self.now, sig, sig._val, self.deltaPhase())
+
+    w = write
+
+
+class StimulusReplayHdlSimulator(DeltaPhaseHdlSimulator):
+    """
+    HdlSimulator for replay of StimulusRecord, writes of simulation processes
+    to replayed signals are ignored, so monitors which drive signals
+    (e.g. ready of handshaked interface) can run together with replay
+
+    @ivar ignoredWrites: set of signals which can be written only by replay
+    """
+    def __init__(self, config=None):
+        super().__init__(config=config)
+        self.ignoredWrites = set()
+
+    def write(self, val, sig):
+        if isinstance(sig, InterfaceBase):
+            sig = sig._sigInside
+        if sig in self.ignoredWrites:
+            return
+        super().write(val, sig)
+
+    w = write
+
+
+def agentMonitors(unit, propName="_ag"):
+    """
+    @return: monitor processes of agents of master interfaces of unit
+             (agents have to be already instantiated by autoAddAgents)
+    """
+    procs = []
+    for intf in unit._interfaces:
+        if intf._direction != INTF_DIRECTION.MASTER:
+            continue
+        if intf._multipliedBy:
+            agentCnt = evalParam(intf._multipliedBy).val
+            agents = [getattr(intf[i], propName) for i in range(agentCnt)]
+        else:
+            agents = [getattr(intf, propName)]
+        for a in agents:
+            procs.extend(a.getMonitors())
+    return procs
@@ -0,0 +1,178 @@
+import numpy as np
+
+
+class GrowableColumn():
+    """
+    NumPy array with amortized O(1) append (capacity is doubled when full)
+    """
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(max(capacity, 1), dtype=dtype)
+        self._size = 0
+
+    def append(self, v):
+        size = self._size
+        data = self._data
+        if size == data.shape[0]:
+            data = self._data = np.resize(data, max(size * 2, 1))
+        data[size] = v
+        self._size = size + 1
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def array(self):
+        """view of used part of the column"""
+        return self._data[:self._size]
+
+
+_UNSIGNED_TYPES = ((np.uint8, 8), (np.uint16, 16), (np.uint32, 32), (np.uint64, 64))
+_SIGNED_TYPES = ((np.int8, 8), (np.int16, 16), (np.int32, 32), (np.int64, 64))
+
+
+def columnDtypeFor(width, signed=False):
+    """
+    Smallest numpy type which can hold width bits (signed type if signed
+    is set), object (python int) for wider values
+    """
+    if width is None:
+        return object
+    for t, w in (_SIGNED_TYPES if signed else _UNSIGNED_TYPES):
+        if width <= w:
+            return t
+    return object
+
+
+class TransactionRecorder():
+    """
+    Columnar storage of transactions collected by simulation agent
+
+    Transactions are stored in growable NumPy columns time, val, vldMask
+    instead of list of Value objects. Values which are not fully valid
+    are stored as 0 in val column (use vld/vldMask to find them).
+
+    @ivar width: width of recorded values in bits (None = unknown before first value)
+    @ivar signed: values are signed (None = unknown before first value)
+    """
+    def __init__(self, width=None, capacity=1024, signed=None):
+        self.width = width
+        self.signed = signed
+        self._capacity = capacity
+        self._time = GrowableColumn(np.int64, capacity)
+        if width is None or signed is None:
+            # resolved from first value
+            self._val = None
+            self._vldMask = None
+        else:
+            self._initValColumns(width, signed)
+
+    def _initValColumns(self, width, signed):
+        self.width = width
+        self.signed = signed
+        self._val = GrowableColumn(columnDtypeFor(width, signed), self._capacity)
+        self._vldMask = GrowableColumn(columnDtypeFor(width), self._capacity)
+
+    def record(self, time, v):
+        """
+        Store value v received in time
+        """
+        if self._val is None:
+            t = v._dtype
+            width = self.width
+            if width is None:
+                try:
+                    width = t.bit_length()
+                except (AttributeError, TypeError):
+                    width = None
+            signed = self.signed
+            if signed is None:
+                signed = bool(getattr(t, "signed", False))
+            self._initValColumns(width, signed)
+
+        vldMask = v.vldMask
+        if self.width is None:
+            vld = bool(vldMask)
+        else:
+            vld = vldMask == (1 << self.width) - 1
+        val = v.val
+        if not vld or val is None:
+            val = 0
+        self._time.append(int(time))
+        self._val.append(val)
+        self._vldMask.append(vldMask)
+
+    def __len__(self):
+        return len(self._time)
+
+    @property
+    def time(self):
+        return self._time.array
+
+    @property
+    def val(self):
+        if self._val is None:
+            return np.empty(0, dtype=np.int64 if self.signed else np.uint64)
+        return self._val.array
+
+    @property
+    def vldMask(self):
+        if self._vldMask is None:
+            return np.empty(0, dtype=np.uint64)
+        return self._vldMask.array
+
+    @property
+    def vld(self):
+        """
+        boolean array, True where value was fully valid
+        """
+        if self.width is None:
+            return np.zeros(len(self), dtype=np.bool_)
+        allMask = (1 << self.width) - 1
+        return self.vldMask == allMask
+
+    def toNpz(self, fileName, compressed=True):
+        """
+        Save columns to .npz file (arrays time, val, vldMask, width, signed)
+        """
+        save = np.savez_compressed if compressed else np.savez
+        save(fileName,
+             time=self.time,
+             val=self.val,
+             vldMask=self.vldMask,
+             width=np.int64(-1 if self.width is None else self.width),
+             signed=np.bool_(bool(self.signed)))
+
+    @classmethod
+    def fromNpz(cls, fileName):
+        """
+        Load recorder saved by toNpz
+        """
+        with np.load(fileName, allow_pickle=True) as d:
+            width = int(d["width"])
+            if width < 0:
+                width = None
+            signed = bool(d["signed"]) if "signed" in d else False
+            time = d["time"]
+            self = cls(width, capacity=len(time), signed=signed)
+            if self._val is None:
+                self._initValColumns(width, signed)
+            for col, arr in ((self._time, time),
+                             (self._val, d["val"]),
+                             (self._vldMask, d["vldMask"])):
+                col._data = np.array(arr, dtype=col._data.dtype)
+                col._size = len(arr)
+        return self
+
+
+def recordAgent(agent, width=None, capacity=1024, signed=None):
+    """
+    Attach TransactionRecorder to agent, data collected by monitor of agent
+    are then stored only in recorder (and not in agent.data)
+
+    @param width: width of values, resolved from first value if None
+    @param signed: signedness of values, resolved from first value if None
+    @return: recorder
+    """
+    r = TransactionRecorder(width, capacity, signed)
+    agent.recorder = r
+    return r
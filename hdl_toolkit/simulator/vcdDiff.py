@@ -0,0 +1,230 @@
+import heapq
+import sys
+
+from hdl_toolkit.simulator.vcdReader import VcdReader
+
+
+def normalizeVcdValue(valStr):
+    """
+    Convert value string from vcd to form where equal values have equal
+    representation (b0011 == b11 == 1, bxxxx == bx == x)
+    """
+    if valStr is None:
+        return None
+    h = valStr[0]
+    if h in "bB":
+        v = valStr[1:].lower()
+        if v and v[0] in "xz":
+            # vector is extended by x/z if its leftmost bit is x/z
+            return v[0] + v.lstrip(v[0])
+        v = v.lstrip("0")
+        if not v:
+            return "0"
+        return v
+    elif h in "rRsS":
+        return valStr[1:]
+    else:
+        return valStr.lower()
+
+
+# normalized value of signal before its first value change in vcd
+UNDUMPED_VALUE = "x"
+
+
+class VcdDivergence():
+    """
+    Time when value of signal differs between traces
+
+    @ivar time: time when values started to differ
+    @ivar valA: value in first trace (normalized vcd string)
+    @ivar valB: value in second trace
+    """
+    __slots__ = ["signal", "time", "valA", "valB"]
+
+    def __init__(self, signal, time, valA, valB):
+        self.signal = signal
+        self.time = time
+        self.valA = valA
+        self.valB = valB
+
+    def __repr__(self):
+        return "<VcdDivergence %s %d %r != %r>" % (self.signal, self.time,
+                                                   self.valA, self.valB)
+
+
+class VcdDiffResult():
+    """
+    Result of comparison of two vcd traces
+
+    @ivar divergences: dict {signal name: list of VcdDivergence}
+                       (only first maxDivergences for every signal)
+    @ivar divergenceCnt: dict {signal name: total number of divergences}
+    @ivar first: earliest VcdDivergence or None if traces are equal
+    @ivar onlyInA: names of signals which are only in first trace
+    @ivar onlyInB: names of signals which are only in second trace
+    @ivar widthMismatch: list of tuples (name, widthA, widthB)
+    """
+    def __init__(self):
+        self.divergences = {}
+        self.divergenceCnt = {}
+        self.first = None
+        self.onlyInA = []
+        self.onlyInB = []
+        self.widthMismatch = []
+
+    def isEqual(self):
+        return self.first is None and not self.onlyInA\
+            and not self.onlyInB and not self.widthMismatch
+
+    def report(self, out=sys.stdout):
+        """
+        Write human readable report of differences
+        """
+        w = out.write
+        for name in self.onlyInA:
+            w("only in A: %s\n" % name)
+        for name in self.onlyInB:
+            w("only in B: %s\n" % name)
+        for name, wA, wB in self.widthMismatch:
+            w("width mismatch: %s %d != %d\n" % (name, wA, wB))
+
+        if self.first is None:
+            w("no value divergence\n")
+            return
+
+        f = self.first
+        w("first divergence: %s at %d (%s != %s)\n" % (f.signal, f.time,
+                                                       f.valA, f.valB))
+        for name in sorted(self.divergences,
+                           key=lambda n: self.divergences[n][0].time):
+            w("%s (%d divergences):\n" % (name, self.divergenceCnt[name]))
+            for d in self.divergences[name]:
+                w("    %d: %s != %s\n" % (d.time, d.valA, d.valB))
+
+
+def _timeSteps(reader, idToNames):
+    """
+    Group changes from vcd by time
+
+    @return: generator of tuples (time, list of (signal name, normalized value))
+    """
+    changes = []
+    now = 0
+    for t, _id, v in reader.changes(ids=idToNames):
+        if _id is None:
+            if t != now:
+                if changes:
+                    yield now, changes
+                    changes = []
+                now = t
+        else:
+            v = normalizeVcdValue(v)
+            for name in idToNames[_id]:
+                changes.append((name, v))
+    if changes:
+        yield now, changes
+
+
+def vcdDiff(fileA, fileB, maxDivergences=10, signals=None):
+    """
+    Compare two vcd traces, signals are aligned by hierarchical name,
+    both traces are streamed in time order, only actual values of signals
+    and first maxDivergences divergences for each signal are kept in memory,
+    signal which value was not dumped yet has value x (as in vcd)
+
+    @param maxDivergences: maximum number of divergences stored for every signal
+    @param signals: optional iterable of hierarchical names of signals to compare
+                    (default all signals present in both traces)
+    @return: VcdDiffResult
+    """
+    res = VcdDiffResult()
+    rA = VcdReader(fileA)
+    rB = VcdReader(fileB)
+    namesA = rA.varsByName
+    namesB = rB.varsByName
+
+    if signals is None:
+        res.onlyInA = [n for n in namesA if n not in namesB]
+        res.onlyInB = [n for n in namesB if n not in namesA]
+        names = [n for n in namesA if n in namesB]
+    else:
+        names = list(signals)
+        res.onlyInA = [n for n in names if n not in namesB and n in namesA]
+        res.onlyInB = [n for n in names if n not in namesA and n in namesB]
+        names = [n for n in names if n in namesA and n in namesB]
+
+    idToNamesA = {}
+    idToNamesB = {}
+    for n in names:
+        vA = namesA[n]
+        vB = namesB[n]
+        if vA.width != vB.width:
+            res.widthMismatch.append((n, vA.width, vB.width))
+            continue
+        idToNamesA.setdefault(vA.id, []).append(n)
+        idToNamesB.setdefault(vB.id, []).append(n)
+
+    valsA = {}
+    valsB = {}
+    # signals which values currently differ
+    diverged = set()
+    divergences = res.divergences
+    divergenceCnt = res.divergenceCnt
+
+    # 0 for A, 1 for B, this keeps A before B in same time
+    steps = heapq.merge(((t, 0, ch) for t, ch in _timeSteps(rA, idToNamesA)),
+                        ((t, 1, ch) for t, ch in _timeSteps(rB, idToNamesB)),
+                        key=lambda x: (x[0], x[1]))
+    pendingTime = None
+    pending = set()
+
+    def resolve(time):
+        for name in pending:
+            a = valsA.get(name, UNDUMPED_VALUE)
+            b = valsB.get(name, UNDUMPED_VALUE)
+            if a == b:
+                diverged.discard(name)
+                continue
+            elif name in diverged:
+                # still different from previous divergence
+                continue
+
+            diverged.add(name)
+            cnt = divergenceCnt.get(name, 0)
+            divergenceCnt[name] = cnt + 1
+            if cnt < maxDivergences:
+                d = VcdDivergence(name, time, a, b)
+                divergences.setdefault(name, []).append(d)
+                if res.first is None or time < res.first.time:
+                    res.first = d
+        pending.clear()
+
+    for t, src, changes in steps:
+        if t != pendingTime:
+            resolve(pendingTime)
+            pendingTime = t
+        vals = valsB if src else valsA
+        for name, v in changes:
+            vals[name] = v
+            pending.add(name)
+
+    resolve(pendingTime)
+
+    return res
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compare two vcd traces")
+    parser.add_argument("fileA")
+    parser.add_argument("fileB")
+    parser.add_argument("-n", type=int, default=10,
+                        help="max number of reported divergences per signal")
+    parser.add_argument("-s", "--signal", action="append", default=None,
+                        help="hierarchical name of signal to compare")
+    args = parser.parse_args()
+
+    r = vcdDiff(args.fileA, args.fileB, maxDivergences=args.n,
+                signals=args.signal)
+    r.report()
+    sys.exit(0 if r.isEqual() else 1)
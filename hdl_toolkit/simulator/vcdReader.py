@@ -0,0 +1,226 @@
+from hdl_toolkit.simulator.exceptions import SimException
+
+
+class VcdParseErr(SimException):
+    """Error in format of vcd file"""
+    pass
+
+
+class VcdVarDecl():
+    """
+    Info about variable declared in header of vcd file
+
+    @ivar id: identifier code of variable in value change section
+    @ivar name: name of variable in its scope
+    @ivar scope: list of names of parent scopes (top first)
+    @ivar width: width of variable in bits
+    @ivar sigType: type of variable from declaration (wire, real, ...)
+    """
+    def __init__(self, _id, name, scope, width, sigType):
+        self.id = _id
+        self.name = name
+        self.scope = scope
+        self.width = width
+        self.sigType = sigType
+
+    @property
+    def fullName(self):
+        """hierarchical name of variable, parts are separated by '.'"""
+        return ".".join(self.scope + [self.name])
+
+    def toJson(self):
+        return {"name": self.fullName,
+                "width": self.width,
+                "type": self.sigType}
+
+    def __repr__(self):
+        return "<VcdVarDecl %s %s %d>" % (self.fullName, self.id, self.width)
+
+
+def parseVcdValue(valStr):
+    """
+    Convert value string from vcd (without identifier) to python value
+
+    @return: tuple (value, vld) where value is int for vectors and scalars,
+             float for reals, str for strings (enums) and vld is False if value
+             contains x or z bits (value is None then)
+    """
+    head = valStr[0]
+    if head in "bB":
+        bits = valStr[1:]
+        try:
+            return int(bits, 2), True
+        except ValueError:
+            return None, False
+    elif head in "rR":
+        try:
+            return float(valStr[1:]), True
+        except ValueError:
+            return None, False
+    elif head in "sS":
+        s = valStr[1:]
+        if s == "XXXX":
+            return None, False
+        return s, True
+    elif head == "0":
+        return 0, True
+    elif head == "1":
+        return 1, True
+    else:
+        # x, z, X, Z
+        return None, False
+
+
+class VcdReader():
+    """
+    Streaming reader of vcd files
+
+    Header is parsed eagerly, value changes are read lazily by changes(),
+    file is never loaded into memory as a whole.
+
+    @ivar vars: list of VcdVarDecl in order of declaration
+    @ivar varsById: dict {id: list of VcdVarDecl}
+                    (in vcd single id can be shared by multiple variables)
+    @ivar varsByName: dict {hierarchical name: VcdVarDecl}
+    @ivar bodyOffset: position in file where value change section starts
+    """
+    SCALAR_VALS = frozenset("01xzXZ")
+
+    def __init__(self, fileName):
+        self.fileName = fileName
+        self.timescale = None
+        self.vars = []
+        self.varsById = {}
+        self.varsByName = {}
+        self.bodyOffset = None
+        with open(fileName, "rb") as f:
+            self._parseHeader(f)
+
+    @staticmethod
+    def _tokens(f):
+        """
+        @return: generator of tuples (offset of line, token) for header tokens
+        """
+        while True:
+            offset = f.tell()
+            line = f.readline()
+            if not line:
+                return
+            for t in line.decode("ascii", "replace").split():
+                yield offset, t
+
+    def _parseHeader(self, f):
+        scope = []
+        tokens = self._tokens(f)
+        for _, t in tokens:
+            if t == "$scope":
+                # $scope module name $end
+                _, _ = next(tokens)
+                _, name = next(tokens)
+                self._expectEnd(tokens)
+                scope.append(name)
+            elif t == "$upscope":
+                self._expectEnd(tokens)
+                scope.pop()
+            elif t == "$var":
+                # $var type width id name [range] $end
+                sigType = next(tokens)[1]
+                width = int(next(tokens)[1])
+                _id = next(tokens)[1]
+                name = next(tokens)[1]
+                for _, t in tokens:
+                    if t == "$end":
+                        break
+                    # bit range [x:y] is not part of the name
+                v = VcdVarDecl(_id, name, list(scope), width, sigType)
+                self.vars.append(v)
+                self.varsById.setdefault(_id, []).append(v)
+                self.varsByName[v.fullName] = v
+            elif t == "$timescale":
+                ts = []
+                for _, t in tokens:
+                    if t == "$end":
+                        break
+                    ts.append(t)
+                self.timescale = "".join(ts)
+            elif t == "$enddefinitions":
+                self._expectEnd(tokens)
+                self.bodyOffset = f.tell()
+                return
+            elif t.startswith("$"):
+                # $date, $version, $comment ...
+                if t != "$end":
+                    self._skipToEnd(tokens)
+            else:
+                raise VcdParseErr("Unexpected token %r in header of %s"
+                                  % (t, self.fileName))
+
+        raise VcdParseErr("Missing $enddefinitions in %s" % (self.fileName))
+
+    def _expectEnd(self, tokens):
+        _, t = next(tokens)
+        if t != "$end":
+            raise VcdParseErr("Expected $end in %s got %r" % (self.fileName, t))
+
+    @staticmethod
+    def _skipToEnd(tokens):
+        for _, t in tokens:
+            if t == "$end":
+                return
+
+    def changes(self, offset=None, ids=None, withOffsets=False):
+        """
+        Iterate value changes from value change section of file
+
+        @param offset: position in file to start reading from
+                       (has to be on start of line, default is start of body)
+        @param ids: optional set of ids of variables which should be reported
+                    (time changes are reported always)
+        @param withOffsets: if True time changes are reported as
+                            (time, None, offset of time line)
+        @return: generator of tuples (time, id, value string), time change
+                 is reported as (time, None, None)
+        """
+        if offset is None:
+            offset = self.bodyOffset
+        scalarVals = self.SCALAR_VALS
+        now = 0
+        with open(self.fileName, "rb") as f:
+            f.seek(offset)
+            pos = offset
+            inComment = False
+            for line in f:
+                lineOffset = pos
+                pos += len(line)
+                tokens = line.decode("ascii", "replace").split()
+                i = 0
+                tCnt = len(tokens)
+                while i < tCnt:
+                    t = tokens[i]
+                    i += 1
+                    if inComment:
+                        if t == "$end":
+                            inComment = False
+                        continue
+
+                    h = t[0]
+                    if h == "#":
+                        now = int(t[1:])
+                        yield (now, None, lineOffset if withOffsets else None)
+                    elif h in scalarVals:
+                        _id = t[1:]
+                        if ids is None or _id in ids:
+                            yield (now, _id, t[0])
+                    elif h in "bBrRsS":
+                        _id = tokens[i]
+                        i += 1
+                        if ids is None or _id in ids:
+                            yield (now, _id, t)
+                    elif h == "$":
+                        # $dumpvars, $dumpall, ... contain regular changes
+                        # only $comment has to be skipped
+                        if t == "$comment":
+                            inComment = True
+                    else:
+                        raise VcdParseErr("Unexpected token %r in %s"
+                                          % (t, self.fileName))
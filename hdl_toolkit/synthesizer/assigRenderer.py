@@ -6,8 +6,8 @@ from hdl_toolkit.hdlObjects.value import Value
 from hdl_toolkit.synthesizer.assigRendererContainers import IfTreeNode
 from hdl_toolkit.synthesizer.rtlLevel.mainBases import RtlSignalBase 
 from hdl_toolkit.synthesizer.rtlLevel.signalUtils.exceptions import MultipleDriversExc
-from hdl_toolkit.synthesizer.termUsageResolver import extractCondTermOrderNonResolved, extractCondTermOrder
-from python_toolkit.arrayQuery import where
+from hdl_toolkit.synthesizer.termUsageResolver import extractCondTermOrderNonResolved, \
+    extractCondTermOrder, countTermUsage
 
 # (max count of elsifs with eq on same variable)
 SWITCH_THRESHOLD = 2  
@@ -98,88 +98,127 @@ def _renderIfTree(node):
                 cases.append((None, ifFalse))
             
                 yield SwitchContainer(switchOn, cases)
-                raise StopIteration()
+                return
     
     yield IfContainer([node.cond], ifTrue, ifFalse, elIfs=elIfs)
 
-def renderIfTree_afterCondSatisfied(assignments, globalCondOrder):
+def renderIfTree_afterCondSatisfied(assignments, condOrder, termUsage=None):
+    """
+    @param condOrder: order of conditions from parent level
+    @param termUsage: dict {cond: usage count} for assignments if already known
+    """
     # there can be only one main condition ant this means 
     # only the most impact cond is taken
     # else no condition is taken and assignment is just statement at this level
     # in this step we are consuming assignment as statement
-    top, topConds = extractCondTermOrderNonResolved(assignments, globalCondOrder)
+    condRank = {c: i for i, c in enumerate(condOrder)}
+    ifs = []
+    while True:
+        top, topConds = extractCondTermOrderNonResolved(assignments, condRank, termUsage)
+
+        if len(topConds) == 0:
+            ifs.extend(top)
+            return ifs
 
-    if len(topConds) == 0:
-        return top 
-    else:
         topCond = topConds[0]
         
         # remove resolved statements from unresolved container
-        for a in top:
-            assignments.remove(a)
+        if top:
+            assignments = [a for a in assignments if a._unresolvedConds]
             
         # create IfTreeNode for topCond
-        ifs = []
-        topIf, notDependent = splitIfTreeOnCond(assignments, topCond, topConds[1:])
+        topIf, assignments, termUsage = splitIfTreeOnCond(assignments, topCond,
+                                                          topConds[1:], termUsage)
         ifs.append(topIf)
-        if notDependent:
-            _ifs = renderIfTree_afterCondSatisfied(notDependent, globalCondOrder)
-            ifs.extend(_ifs)
-            
-        return ifs
+        if not assignments:
+            return ifs
     
-def splitIfTreeOnCond(assignments, topCond, globalCondOrder):
+def splitIfTreeOnCond(assignments, topCond, condOrder, termUsage=None):
+    """
+    Split assignments on topCond and render if tree for assignments
+    dependent on it
+
+    @param termUsage: dict {cond: usage count} for assignments if already known
+    @return: tuple (IfTreeNode, not dependent assignments,
+                    termUsage for not dependent assignments)
+    """
     # in this step we are consuming unresolvedConds and building IfTreeNodes
 
     topPos = []
     topNeg = []
     notDependent = []
     for a in assignments:
-        dependentOnTopCond = list(where(a._unresolvedConds, lambda cond: cond[0] is topCond))
-        l = len(dependentOnTopCond)
-        
-        if l == 0:
+        conds = a._unresolvedConds
+        try:
+            negFlags = conds[topCond]
+        except KeyError:
             notDependent.append(a)
-        elif l == 1:
-            _c = dependentOnTopCond[0]
-            a._unresolvedConds.remove(_c)
-            
-            if _c[1]:
-                topNeg.append(a)
-            else:
-                topPos.append(a)
+            continue
+
+        if len(negFlags) > 1:
+            raise NotImplementedError([(topCond, f) for f in negFlags])
+        del conds[topCond]
+
+        if negFlags[0]:
+            topNeg.append(a)
         else:
-            raise NotImplementedError(dependentOnTopCond)     
-    # if not (len(assignments) == (len(topNeg) + len(topPos))):
-    #    # it seems that there is some statement which is nod depended on topCond, but it should be 
-    #    # filtered earlier
-    #    raise AssertionError(("got assignments %s and topCond %s \n for neg resolved %s,\n" + 
-    #                         " for pos resolved %s\n" + 
-    #                         "something lost or duplicited in statement renderer") 
-    #                         % (str(assignments), str(topCond), str(topNeg), str(topPos)))
+            topPos.append(a)
+
     if len(topPos) + len(topNeg) == 0:
         raise AssertionError("Something should be dependent")
-    
+
+    # usage of terms in largest part is resolved from usage in all assignments
+    # so every assignment is counted only in smaller parts (near linear complexity
+    # for long chains of elsifs)
+    parts = [topPos, topNeg, notDependent]
+    largest = max(parts, key=len)
+    usages = []
+    for part in parts:
+        if part is largest:
+            usages.append(None)
+        else:
+            usages.append(countTermUsage(part))
+
+    if termUsage is None:
+        largestUsage = countTermUsage(largest)
+    else:
+        largestUsage = dict(termUsage)
+        largestUsage.pop(topCond, None)
+        for u in usages:
+            if u is not None:
+                for c, n in u.items():
+                    n = largestUsage[c] - n
+                    if n:
+                        largestUsage[c] = n
+                    else:
+                        del largestUsage[c]
+    usages[parts.index(largest)] = largestUsage
+    posUsage, negUsage, notDependentUsage = usages
+
     top = IfTreeNode(topCond)
-    top.pos = renderIfTree_afterCondSatisfied(topPos, globalCondOrder)
-    top.neg = renderIfTree_afterCondSatisfied(topNeg, globalCondOrder)
-    return top, notDependent
+    top.pos = renderIfTree_afterCondSatisfied(topPos, condOrder, posUsage)
+    top.neg = renderIfTree_afterCondSatisfied(topNeg, condOrder, negUsage)
+    return top, notDependent, notDependentUsage
 
 
 def renderIfTree(assignments):
     """
     Walk assignments and resolve if tree from conditions
+    (order of assignments in every branch is order of their creation)
     """
-    condOrder = list(extractCondTermOrder(assignments))
+    assignments = sorted(assignments, key=lambda a: a._instId)
+    while True:
+        condOrder = list(extractCondTermOrder(assignments))
     
-    if condOrder:
-        # split assignments on most important condition
-        topCond = condOrder[0]
-        top, notDependent = splitIfTreeOnCond(assignments, topCond, condOrder)
+        if condOrder:
+            # split assignments on most important condition
+            topCond = condOrder[0]
+            top, assignments, _ = splitIfTreeOnCond(assignments, topCond, condOrder)
         
-        yield from _renderIfTree(top)
-        if notDependent:
-            yield from renderIfTree(notDependent)
-    else:
-        # none of assignments has condition no If or switch is needed
-        yield from assignments
+            yield from _renderIfTree(top)
+            if not assignments:
+                return
+        else:
+            # none of assignments has condition no If or switch is needed
+            yield from assignments
+            return
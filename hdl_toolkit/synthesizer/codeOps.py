@@ -1,4 +1,4 @@
-from operator import and_, or_
+from operator import and_, or_, xor
 import types
 
 from hdl_toolkit.hdlObjects.operatorDefs import concatFn
@@ -122,15 +122,11 @@ def In(sigOrVal, iterable):
     """
     Hdl conversible in operator, check if any of items in "iterable" equals "sigOrVal"
     """
-    res = None
-    for i in iterable:
-        i = toHVal(i)
-        if res is None:
-            res = sigOrVal._eq(i)
-        else:
-            res = res | sigOrVal._eq(i)
+    eqs = [sigOrVal._eq(toHVal(i)) for i in iterable]
+    if not eqs:
+        return None
 
-    return res
+    return balancedReduce(or_, eqs)
 
 class FsmBuilder(StmCntx):
     """
@@ -318,16 +314,26 @@ def packedWidth(intf):
             return 1
         return t.bit_length()
 
+def balancedReduce(fn, items):
+    """
+    Reduce items by associative binary function fn to balanced tree
+    (depth is log2(len(items)) instead of len(items) for left-deep chain),
+    order of items is preserved
+    """
+    items = list(items)
+    assert items, items
+    while len(items) > 1:
+        reduced = [fn(items[i], items[i + 1]) for i in range(0, len(items) - 1, 2)]
+        if len(items) % 2:
+            reduced.append(items[-1])
+        items = reduced
+
+    return items[0]
+
 def _mkOp(fn): 
     def op(*ops):
         assert ops, ops
-        top = None 
-        for s in ops:
-            if top is None:
-                top = s
-            else:
-                top = fn(top, s)
-        return top
+        return balancedReduce(fn, ops)
     return op
 
 # variadic operator functions
@@ -343,6 +349,18 @@ def iterBits(sig):
     for bit in range(l):
         yield sig[bit] 
 
+def _mkReduce(fn):
+    def reduce(sig):
+        if sig._dtype == BIT:
+            return sig
+        return balancedReduce(fn, iterBits(sig))
+    return reduce
+
+# reduction of all bits of vector to single bit
+andReduce = _mkReduce(and_)
+orReduce = _mkReduce(or_)
+xorReduce = _mkReduce(xor)
+
 def power(base, exp):
     return toHVal(base)._pow(exp) 
 
@@ -0,0 +1,477 @@
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from hashlib import sha1
+import inspect
+import os
+import pickle
+import re
+import sys
+import sysconfig
+from types import FunctionType, ModuleType
+
+import hdl_toolkit
+from hdl_toolkit.hdlObjects.specialValues import DIRECTION
+from hdl_toolkit.hdlObjects.types.bits import Bits
+from hdl_toolkit.synthesizer.interfaceLevel.mainBases import InterfaceBase, UnitBase
+from hdl_toolkit.synthesizer.interfaceLevel.unit import Unit
+from hdl_toolkit.synthesizer.param import evalParam, Param
+
+
+_TOOLKIT_DIR = os.path.dirname(os.path.abspath(hdl_toolkit.__file__))
+_STDLIB_DIR = os.path.abspath(sysconfig.get_paths()["stdlib"])
+
+# attributes of unit which are set by toolkit (not configuration of unit)
+_FRAMEWORK_ATTRS = frozenset(("_architecture", "_checkIntferfaces", "_cntx", "_entity",
+                              "_interfaces", "_lazyLoaded", "_name", "_params",
+                              "_parent", "_setAttrListener", "_units",
+                              "_elaborationCache", "_profiler"))
+
+# {file name: (mtime, size, hash of content)}
+_fileHashes = {}
+_toolkitHash = None
+
+
+def _fileHash(fileName):
+    st = os.stat(fileName)
+    stamp = (st.st_mtime_ns, st.st_size)
+    c = _fileHashes.get(fileName, None)
+    if c is not None and c[0] == stamp:
+        return c[1]
+    with open(fileName, "rb") as f:
+        h = sha1(f.read()).hexdigest()
+    _fileHashes[fileName] = (stamp, h)
+    return h
+
+
+def _toolkitSourceHash():
+    """
+    Hash of all sources of hdl_toolkit (resolved once per process)
+    """
+    global _toolkitHash
+    if _toolkitHash is None:
+        h = sha1()
+        for root, dirs, files in os.walk(_TOOLKIT_DIR):
+            dirs.sort()
+            for f in sorted(files):
+                if f.endswith(".py"):
+                    fn = os.path.join(root, f)
+                    h.update(os.path.relpath(fn, _TOOLKIT_DIR).encode())
+                    h.update(_fileHash(fn).encode())
+        _toolkitHash = h.hexdigest()
+    return _toolkitHash
+
+
+def _moduleFile(moduleName):
+    """
+    @return: source file of module if it is not part of hdl_toolkit
+             or standard library, "" if it is, None if it is unknown
+    """
+    m = sys.modules.get(moduleName, None)
+    if m is None:
+        return None
+    if moduleName == "builtins":
+        return ""
+    fn = getattr(m, "__file__", None)
+    if fn is None:
+        return None
+    fn = os.path.abspath(fn)
+    if fn.startswith(_TOOLKIT_DIR + os.sep) or fn.startswith(_STDLIB_DIR + os.sep):
+        # covered by _toolkitSourceHash or python version
+        return ""
+    return fn
+
+
+def _moduleFiles(cls, files):
+    """
+    Add source files of modules of cls, its base classes and files of modules
+    which are used by them (imported modules, functions and classes)
+
+    @return: False if some source file is not available
+    """
+    for c in cls.__mro__:
+        fn = _moduleFile(c.__module__)
+        if fn is None:
+            return False
+        if not fn or fn in files:
+            continue
+        files.add(fn)
+        # helpers used by unit code
+        for v in list(vars(sys.modules[c.__module__]).values()):
+            if isinstance(v, ModuleType):
+                name = v.__name__
+            elif isinstance(v, (type, FunctionType)):
+                name = v.__module__
+            else:
+                continue
+            helperFile = _moduleFile(name)
+            if helperFile:
+                files.add(helperFile)
+    return True
+
+
+def _sourceHash(unit):
+    """
+    @return: hash of sources of unit class, its base classes, classes of its
+             interfaces and modules used by them or None if sources are not available
+    """
+    files = set()
+    if not _moduleFiles(unit.__class__, files):
+        return None
+    toSearch = list(unit._interfaces)
+    while toSearch:
+        i = toSearch.pop()
+        if not _moduleFiles(i.__class__, files):
+            return None
+        toSearch.extend(i._interfaces)
+
+    h = sha1()
+    for fn in sorted(files):
+        try:
+            h.update(_fileHash(fn).encode())
+        except OSError:
+            return None
+    return h.hexdigest()
+
+
+def _paramValues(unit):
+    """
+    Values of params of unit (same as paramsToValTuple, but hashable
+    and usable also for unit without params)
+    """
+    vals = []
+    for p in unit._params:
+        v = evalParam(p)
+        vals.append((p.getName(unit), v._dtype.__class__.__name__, str(v.val), v.vldMask))
+    vals.sort()
+    return tuple(vals)
+
+
+class _NotPlainData(Exception):
+    pass
+
+
+def _plainData(v):
+    """
+    @return: hashable representation of configuration value
+    @raise _NotPlainData: if value can not be represented
+    """
+    if v is None or isinstance(v, (bool, int, float, complex, str, bytes)):
+        return (v.__class__.__name__, v)
+    elif isinstance(v, Enum):
+        return ("enum", v.__class__.__module__, v.__class__.__qualname__, v.name)
+    elif isinstance(v, (type, FunctionType)):
+        return ("def", v.__module__, v.__qualname__)
+    elif isinstance(v, (Param, InterfaceBase, UnitBase)):
+        # f.e. list of subunits, they are compared separately
+        return (v.__class__.__qualname__, getattr(v, "_name", None))
+    elif isinstance(v, (tuple, list)):
+        return (v.__class__.__name__,) + tuple(_plainData(x) for x in v)
+    elif isinstance(v, (set, frozenset)):
+        return (v.__class__.__name__,) + tuple(sorted(repr(_plainData(x)) for x in v))
+    elif isinstance(v, dict):
+        return ("dict",) + tuple(sorted(repr((_plainData(k), _plainData(x)))
+                                        for k, x in v.items()))
+    raise _NotPlainData(v)
+
+
+def _configAttrs(unit):
+    """
+    Attributes of unit which are not Params, interfaces, units
+    or attributes set by toolkit (configuration from constructor or parent)
+
+    @return: tuple of (name, value) or None if some value can not be
+             represented (such a unit can not be cached)
+    """
+    res = []
+    for name, v in unit.__dict__.items():
+        if name in _FRAMEWORK_ATTRS or isinstance(v, (Param, InterfaceBase, UnitBase)):
+            continue
+        try:
+            res.append((name, _plainData(v)))
+        except _NotPlainData:
+            return None
+    res.sort()
+    return tuple(res)
+
+
+def _dtypeSignature(t):
+    if isinstance(t, Bits):
+        return ("Bits", t.bit_length(), t.signed, t.forceVector)
+    return (t.__class__.__name__, getattr(t, "name", None))
+
+
+def _interfacesSignature(unit):
+    """
+    Names, classes, params and types of signals of interfaces of unit
+    """
+    def intfSig(i):
+        params = tuple(sorted((p.getName(i), str(evalParam(p).val)) for p in i._params))
+        m = i._multipliedBy
+        if m is not None:
+            m = str(evalParam(m).val)
+        dtype = getattr(i, "_dtype", None)
+        if dtype is not None:
+            dtype = _dtypeSignature(dtype)
+        return (i._name, i.__class__.__module__, i.__class__.__qualname__,
+                params, m, dtype, tuple(intfSig(c) for c in i._interfaces))
+
+    return tuple(intfSig(i) for i in unit._interfaces)
+
+
+def _renameEntities(hdl, oldNames, newNames):
+    renames = {old: new for old, new in zip(oldNames, newNames) if old != new}
+    if not renames:
+        return hdl
+    pattern = r"\b(%s)\b" % "|".join(re.escape(n) for n in renames)
+    return re.sub(pattern, lambda m: renames[m.group(1)], hdl)
+
+
+def _rebuildUnit(unitCls, paramValues):
+    """
+    Construct unit from its class and values of its params
+    """
+    u = unitCls()
+    for p in u._params:
+        p.set(paramValues[p.getName(u)])
+    return u
+
+
+def _elaborateInWorker(unitCls, name, paramValues, serializer, key):
+    """
+    Elaborate unit in worker process
+
+    @param key: key of unit in parent process
+    @return: entries of cache for unit and its subunits
+             (empty if unit was elaborated with different key)
+    """
+    from hdl_toolkit.synthesizer.shortcuts import toRtl
+    u = _rebuildUnit(unitCls, paramValues)
+    cache = ElaborationCache()
+    toRtl(u, name=name, serializer=serializer, cache=cache)
+    if key not in cache._entries:
+        return {}
+    return cache._entries
+
+
+class ElaborationCache():
+    """
+    Cache of serialized architectures of units shared between runs
+    of toRtl/toRtlAndSave
+
+    Entries are keyed by class of unit, hash of sources (unit class, its
+    base classes, classes of its interfaces, modules used by them and
+    hdl_toolkit), values of its params, other attributes of unit
+    (configuration from constructor or parent), interfaces and serializer.
+    Units with attributes which can not be compared (other than plain python
+    data) are not cached. Keys of subunits are part of key of unit, so unit
+    is cached only if all its subunits can be cached. When unit is found
+    in cache its _impl and synthesis is skipped, only entity is built
+    (directions of ports are loaded from cache) and serialized architecture
+    is spliced into output (names of entities of subunits are updated
+    if they differ). Subunits of such a unit are loaded from cache as well.
+
+    Units which are registering subunits in _impl are not cached.
+
+    If workers > 1 independent subunits are elaborated in process pool
+    before they are elaborated by parent (units are constructed again
+    in worker from class and values of params, so class has to be importable
+    and constructor can not have arguments, otherwise unit is elaborated
+    sequentially). Units are elaborated in worker only if instance constructed
+    in this way has the same key as original unit. Workers only fill cache,
+    output is produced by parent in the same order as without workers.
+
+    @ivar folder: folder where entries are stored (None = only in memory)
+    @ivar workers: number of processes for elaboration of subunits
+    @ivar serializer: serializer used by actual run (set by toRtl/toRtlAndSave)
+    @ivar hits: number of units loaded from cache
+    @ivar misses: number of units which were elaborated
+    """
+    def __init__(self, folder=None, workers=1):
+        self.folder = folder
+        self.workers = workers
+        if folder is not None:
+            os.makedirs(folder, exist_ok=True)
+        self.serializer = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        # {unit: key} keys of units in actual run
+        self._keys = {}
+        # {unit: entry} for units loaded from cache in actual run
+        self._loaded = {}
+        # {unit: (key, entry without architecture)} for units which will be stored
+        self._pending = {}
+
+    def _key(self, unit):
+        """
+        @return: key of unit in cache or None if unit can not be cached
+        """
+        try:
+            return self._keys[unit]
+        except KeyError:
+            pass
+        key = self._resolveKey(unit)
+        self._keys[unit] = key
+        return key
+
+    def _resolveKey(self, unit):
+        srcHash = _sourceHash(unit)
+        if srcHash is None:
+            return None
+        config = _configAttrs(unit)
+        if config is None:
+            return None
+        children = []
+        for u in unit._units:
+            k = self._key(u)
+            if k is None:
+                return None
+            children.append(k)
+        return sha1(repr((unit.__class__.__module__,
+                          unit.__class__.__qualname__,
+                          srcHash,
+                          _toolkitSourceHash(),
+                          _paramValues(unit),
+                          config,
+                          _interfacesSignature(unit),
+                          tuple(children),
+                          self.serializer.__name__)).encode()).hexdigest()
+
+    def _fileName(self, key):
+        return os.path.join(self.folder, key + ".pickle")
+
+    def _load(self, key):
+        try:
+            return self._entries[key]
+        except KeyError:
+            pass
+        if self.folder is None:
+            return None
+        try:
+            with open(self._fileName(key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # missing or stale entry
+            return None
+        self._entries[key] = entry
+        return entry
+
+    def _save(self, key, entry):
+        self._entries[key] = entry
+        if self.folder is not None:
+            with open(self._fileName(key), "wb") as f:
+                pickle.dump(entry, f)
+
+    def _canRebuild(self, unit, key, paramValues):
+        """
+        Check if unit can be constructed again in worker only from its class
+        and values of its params (constructor without arguments and same
+        configuration as fresh instance)
+        """
+        unitCls = unit.__class__
+        try:
+            sig = inspect.signature(unitCls.__init__)
+        except (TypeError, ValueError):
+            return False
+        if len(sig.parameters) != 1:
+            # only self
+            return False
+
+        try:
+            u = _rebuildUnit(unitCls, paramValues)
+            u._loadDeclarations()
+        except Exception:
+            return False
+        return self._key(u) == key
+
+    def prefetch(self, units):
+        """
+        Elaborate units which are not in cache in process pool
+        (subunits of unit are elaborated in the same worker as unit)
+        """
+        if self.workers <= 1:
+            return
+
+        jobs = {}
+        for u in units:
+            key = self._key(u)
+            if key is None or key in jobs or self._load(key) is not None:
+                continue
+            paramValues = {p.getName(u): evalParam(p) for p in u._params}
+            if not self._canRebuild(u, key, paramValues):
+                continue
+            jobs[key] = (u, paramValues)
+
+        if len(jobs) < 2:
+            return
+
+        with ProcessPoolExecutor(self.workers) as executor:
+            futures = []
+            for key, (u, paramValues) in jobs.items():
+                u._initName()
+                futures.append(executor.submit(_elaborateInWorker, u.__class__, u._name,
+                                               paramValues, self.serializer, key))
+
+            for f in futures:
+                try:
+                    entries = f.result()
+                except Exception:
+                    # unit will be elaborated by parent and error reported there
+                    continue
+                for key, entry in entries.items():
+                    if key not in self._entries:
+                        self._save(key, entry)
+
+    def lookup(self, unit):
+        """
+        Find unit in cache (before its subunits are elaborated)
+
+        @return: names of output ports of unit if it was found in cache else None
+        """
+        key = self._key(unit)
+        if key is None:
+            return None
+
+        entry = self._load(key)
+        if entry is not None:
+            self._loaded[unit] = entry
+            self.hits += 1
+            return entry["outputs"]
+
+        self._pending[unit] = (key, {})
+        self.misses += 1
+        return None
+
+    def registerEntity(self, unit, ent):
+        """
+        Remember directions of ports of synthesized unit
+        (has to be called before directions of ports are updated from interfaces)
+        """
+        try:
+            _, entry = self._pending[unit]
+        except KeyError:
+            return
+        entry["outputs"] = [p.name for p in ent.ports if p.direction == DIRECTION.OUT]
+
+    def Architecture(self, arch, scope):
+        """
+        Serialize architecture or load it from cache
+        """
+        unit = arch.entity.origin
+        names = [unit._entity.name] + [u._entity.name for u in unit._units]
+
+        entry = self._loaded.pop(unit, None)
+        if entry is not None:
+            return _renameEntities(entry["architecture"], entry["names"], names)
+
+        hdl = self.serializer.Architecture(arch, scope)
+        try:
+            key, entry = self._pending.pop(unit)
+        except KeyError:
+            return hdl
+
+        if not unit._lazyLoaded:
+            entry["names"] = names
+            entry["architecture"] = hdl
+            self._save(key, entry)
+        return hdl
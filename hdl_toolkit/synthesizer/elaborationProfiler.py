@@ -0,0 +1,184 @@
+import json
+from time import perf_counter
+
+
+class _PhaseTimer():
+    """
+    Context manager which adds time spent in it to phase of UnitProfile,
+    time of phases nested in it (f.e. subunits elaborated in _impl of parent)
+    is not included
+    """
+    __slots__ = ["phases", "name", "stack", "start", "nested"]
+
+    def __init__(self, phases, name, stack):
+        self.phases = phases
+        self.name = name
+        self.stack = stack
+
+    def __enter__(self):
+        self.nested = 0.0
+        self.stack.append(self)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        t = perf_counter() - self.start
+        stack = self.stack
+        stack.pop()
+        if stack:
+            stack[-1].nested += t
+        self.phases[self.name] = self.phases.get(self.name, 0.0) + t - self.nested
+        return False
+
+
+class _NoPhase():
+    """
+    Context manager used when profiling is disabled
+    """
+    __slots__ = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+_NO_PHASE = _NoPhase()
+
+
+def phase(profile, name):
+    """
+    @param profile: UnitProfile or None if profiling is disabled
+    @return: context manager which measures time of phase
+    """
+    if profile is None:
+        return _NO_PHASE
+    return _PhaseTimer(profile.phases, name, profile._stack)
+
+
+class UnitProfile():
+    """
+    Wall times of phases of elaboration of single unit and numbers
+    of objects in its netlist
+
+    Times of subunits are not included in times of phases of parent
+    (also for subunits which are declared in _loadDeclarations or registered
+    in _impl of parent, their phases are nested in phase of parent).
+
+    @ivar name: name of unit
+    @ivar className: name of class of unit
+    @ivar phases: dict {phase name: time in seconds}
+    @ivar counts: dict {object name: count} (signals, operators, processes ...)
+    @ivar children: list of UnitProfile of subunits
+    """
+    def __init__(self, name, className, stack):
+        self.name = name
+        self.className = className
+        self.phases = {}
+        self.counts = {}
+        self.children = []
+        # stack of active _PhaseTimers (shared by all profiles of profiler)
+        self._stack = stack
+
+    def time(self):
+        """
+        @return: time of all phases of this unit without subunits
+        """
+        return sum(self.phases.values())
+
+    def totalTime(self):
+        """
+        @return: time of all phases of this unit and its subunits
+        """
+        t = 0.0
+        toSearch = [self]
+        while toSearch:
+            p = toSearch.pop()
+            t += p.time()
+            toSearch.extend(p.children)
+        return t
+
+    def toDict(self):
+        return {"name": self.name,
+                "class": self.className,
+                "time": self.time(),
+                "totalTime": self.totalTime(),
+                "phases": dict(self.phases),
+                "counts": dict(self.counts),
+                "children": [c.toDict() for c in self.children]}
+
+    def _reportLines(self, indent, lines):
+        if self.name == self.className:
+            label = self.name
+        else:
+            label = "%s (%s)" % (self.name, self.className)
+        counts = ", ".join("%s: %d" % c for c in self.counts.items())
+        lines.append("%s%s: %.3fs (total %.3fs) %s" % (indent, label, self.time(),
+                                                      self.totalTime(), counts))
+        indent += "    "
+        for name, t in sorted(self.phases.items(), key=lambda x: x[1], reverse=True):
+            lines.append("%s%s: %.3fs" % (indent, name, t))
+        for c in self.children:
+            c._reportLines(indent, lines)
+
+
+class ElaborationProfiler():
+    """
+    Opt-in instrumentation of toRtl/toRtlAndSave, records wall time
+    of phases of elaboration (loadDeclarations, impl, connectInterfaces,
+    simplifyOperators, mergeEqualOperators, removeUnconnectedSignals,
+    renderIfTree, discoverSensitivity, serialize ...) and numbers
+    of objects for each unit
+
+    @ivar root: UnitProfile of top unit
+    """
+    def __init__(self):
+        self.root = None
+        self._profiles = {}
+        self._stack = []
+
+    def profileOf(self, unit, parent=None):
+        """
+        Get UnitProfile for unit (create it if it does not exist yet)
+
+        @param parent: parent unit, new profile is added to its children
+        """
+        name = getattr(unit, "_name", unit.__class__.__name__)
+        try:
+            p = self._profiles[unit]
+        except KeyError:
+            pass
+        else:
+            # name of unit can be resolved later than profile was created
+            p.name = name
+            return p
+
+        p = UnitProfile(name, unit.__class__.__name__, self._stack)
+        self._profiles[unit] = p
+        if parent is None:
+            if self.root is None:
+                self.root = p
+        else:
+            self.profileOf(parent).children.append(p)
+        return p
+
+    def report(self):
+        """
+        @return: text with tree of units and times of their phases
+        """
+        if self.root is None:
+            return ""
+        lines = []
+        self.root._reportLines("", lines)
+        return "\n".join(lines)
+
+    def toDict(self):
+        if self.root is None:
+            return None
+        return self.root.toDict()
+
+    def toJson(self, **kwargs):
+        """
+        @param kwargs: arguments for json.dumps
+        """
+        return json.dumps(self.toDict(), **kwargs)
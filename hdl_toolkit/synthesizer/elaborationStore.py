@@ -0,0 +1,268 @@
+"""
+Binary persistence of elaborated units (unit, its netlist, entities
+and architectures produced by Unit._toRtl)
+
+Netlist is a cyclic graph (signal -> endpoints -> operator -> result ...)
+and standard pickle would recurse through it, so objects are flattened
+in to table first. Each mutable object is stored as single record
+and references between objects are stored as indexes to this table
+(pickle persistent ids), so pickle never descends from one object
+to another.
+"""
+
+from collections import deque
+from enum import Enum
+import gzip
+import pickle
+from types import FunctionType, BuiltinFunctionType, MethodType
+
+from hdl_toolkit.hdlObjects.operatorDefs import AllOps, OpDefinition
+from hdl_toolkit.hdlObjects.types import defs
+
+# types which are pickled as part of record of object which is using them
+_INLINE_TYPES = (type(None), bool, int, float, complex, str, bytes, range, slice,
+                 type, FunctionType, BuiltinFunctionType, Enum)
+
+# exact types of values which are not objects of graph (fast path of isinstance)
+_ATOMS = frozenset((type(None), bool, int, float, str, bytes, type, FunctionType))
+
+_K_LIST = 0
+_K_DICT = 1
+_K_SET = 2
+_K_DEQUE = 3
+_K_OBJ = 4
+
+
+def _globalObjects():
+    """
+    Objects which are stored only by name (they have to stay unique)
+
+    @return: dict {id: name}, dict {name: object}
+    """
+    byName = {}
+    for n in dir(AllOps):
+        o = getattr(AllOps, n)
+        if isinstance(o, OpDefinition):
+            byName["AllOps." + n] = o
+    for n in dir(defs):
+        o = getattr(defs, n)
+        if not isinstance(o, _INLINE_TYPES) and not n.startswith("_"):
+            byName["defs." + n] = o
+
+    return {id(o): n for n, o in byName.items()}, byName
+
+
+# {class: names of all its slots}
+_slotNamesCache = {}
+
+def _slotNames(cls):
+    try:
+        return _slotNamesCache[cls]
+    except KeyError:
+        pass
+
+    names = []
+    for c in cls.__mro__:
+        slots = c.__dict__.get("__slots__", ())
+        if isinstance(slots, str):
+            slots = (slots,)
+        for s in slots:
+            if s not in ("__dict__", "__weakref__"):
+                names.append(s)
+    names = tuple(names)
+    _slotNamesCache[cls] = names
+    return names
+
+
+# {class: True if instances can be restored from __dict__ and __slots__}
+_plainClassCache = {}
+
+def _isPlainClass(cls):
+    """
+    @return: False if class has custom pickling (__reduce__, __getstate__ ...)
+             its state would not be restored from __dict__ and __slots__
+    """
+    try:
+        return _plainClassCache[cls]
+    except KeyError:
+        pass
+
+    plain = (cls.__reduce_ex__ is object.__reduce_ex__
+             and cls.__reduce__ is object.__reduce__
+             and getattr(cls, "__getstate__", None) is getattr(object, "__getstate__", None)
+             and not hasattr(cls, "__setstate__")
+             and not hasattr(cls, "__getnewargs__")
+             and not hasattr(cls, "__getnewargs_ex__"))
+    _plainClassCache[cls] = plain
+    return plain
+
+
+class _Unset():
+    """
+    Value of slot which was not set
+    """
+
+
+def _objState(obj):
+    """
+    @return: tuple (items of __dict__, values of __slots__)
+    """
+    d = getattr(obj, "__dict__", None)
+    if d is None:
+        d = ()
+    else:
+        d = tuple(d.items())
+
+    return d, tuple(getattr(obj, s, _Unset) for s in _slotNames(obj.__class__))
+
+
+def _record(obj):
+    """
+    @return: tuple (kind, payload) where payload contains only tuples,
+             inline values and other objects (stored as references)
+    """
+    cls = obj.__class__
+    if isinstance(obj, list):
+        return (_K_LIST, cls), tuple(obj)
+    elif isinstance(obj, dict):
+        return (_K_DICT, cls), tuple(obj.items())
+    elif isinstance(obj, set):
+        return (_K_SET, cls), tuple(obj)
+    elif isinstance(obj, deque):
+        return (_K_DEQUE, obj.maxlen), tuple(obj)
+    elif cls.__module__ == "builtins" or isinstance(obj, MethodType) \
+            or not _isPlainClass(cls):
+        raise TypeError("Object %r can not be stored" % (obj,))
+
+    return (_K_OBJ, cls), _objState(obj)
+
+
+class _FlatPickler(pickle.Pickler):
+    def __init__(self, f, index, globalIds):
+        super().__init__(f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.index = index
+        self.globalIds = globalIds
+
+    def persistent_id(self, obj):
+        # values which are not in index are pickled inline
+        i = id(obj)
+        pid = self.index.get(i, None)
+        if pid is None:
+            return self.globalIds.get(i, None)
+        return pid
+
+
+class _FlatUnpickler(pickle.Unpickler):
+    def __init__(self, f, objects, globalObjects):
+        super().__init__(f)
+        self.objects = objects
+        self.globalObjects = globalObjects
+
+    def persistent_load(self, pid):
+        if isinstance(pid, int):
+            return self.objects[pid]
+        else:
+            return self.globalObjects[pid]
+
+
+def _flatten(root, globalIds):
+    """
+    Walk object graph (without recursion)
+
+    @return: list of objects, dict {id(obj): index}, list of records
+    """
+    objects = []
+    index = {}
+    records = []
+
+    def walkValue(v):
+        # tuples are inline but they can contain objects
+        stack = [v]
+        while stack:
+            v = stack.pop()
+            t = type(v)
+            if t in _ATOMS:
+                continue
+            i = id(v)
+            if i in index or i in globalIds:
+                continue
+            elif t is tuple or t is frozenset:
+                stack.extend(v)
+            elif not isinstance(v, _INLINE_TYPES):
+                index[i] = len(objects)
+                objects.append(v)
+
+    walkValue(root)
+    # objects are appended while they are discovered
+    i = 0
+    while i < len(objects):
+        r = _record(objects[i])
+        records.append(r)
+        walkValue(r[1])
+        i += 1
+
+    return objects, index, records
+
+
+def saveElaborated(fileName, unit, objs, compresslevel=6):
+    """
+    Save elaborated unit together with objects produced by its _toRtl
+    (entities, architectures ...) to file
+
+    All objects reachable from unit and objs are stored, classes are stored
+    only by name, so they have to be importable when file is loaded.
+    Operator definitions and types from types.defs are stored as references
+    to the objects of actual process.
+    """
+    globalIds, _ = _globalObjects()
+    root = [unit, list(objs)]
+    objects, index, records = _flatten(root, globalIds)
+
+    with gzip.open(fileName, "wb", compresslevel=compresslevel) as f:
+        pickle.dump([kind for kind, _ in records], f, protocol=pickle.HIGHEST_PROTOCOL)
+        p = _FlatPickler(f, index, globalIds)
+        p.dump([payload for _, payload in records])
+
+
+def loadElaborated(fileName):
+    """
+    Load unit stored by saveElaborated
+
+    @return: tuple (unit, list of objects produced by its _toRtl)
+    """
+    _, globalObjects = _globalObjects()
+    with gzip.open(fileName, "rb") as f:
+        kinds = pickle.load(f)
+        objects = []
+        for k, arg in kinds:
+            if k == _K_DEQUE:
+                o = deque(maxlen=arg)
+            elif k == _K_OBJ:
+                o = arg.__new__(arg)
+            else:
+                o = arg()
+            objects.append(o)
+
+        payloads = _FlatUnpickler(f, objects, globalObjects).load()
+
+    # state of objects has to be restored before they are used as keys
+    hashed = []
+    for (k, _), o, payload in zip(kinds, objects, payloads):
+        if k == _K_LIST or k == _K_DEQUE:
+            o.extend(payload)
+        elif k == _K_OBJ:
+            d, slots = payload
+            if d:
+                o.__dict__.update(d)
+            if slots:
+                for name, v in zip(_slotNames(o.__class__), slots):
+                    if v is not _Unset:
+                        object.__setattr__(o, name, v)
+        else:
+            hashed.append((k, o, payload))
+
+    for k, o, payload in hashed:
+        o.update(payload)
+
+    unit, objs = objects[0]
+    return unit, objs
@@ -17,16 +17,19 @@ class InterfaceDirectionFns():
             for i in self._interfaces:
                 i._setDirectionsLikeIn(opDir)
         
-    def __directionProbe(self):
+    def __directionProbe(self, isDriven):
         if not self._interfaces:
             s = self._sig
-            d = self._masterDir
-            return (not bool(s.drivers), bool(s.drivers))
+            if isDriven is None:
+                driven = bool(s.drivers)
+            else:
+                driven = isDriven(s)
+            return (not driven, driven)
         
         allInMasterConf = True
         allInSlaveConf = True
         for i in self._interfaces:
-            i._resolveDirections(updateDir=False)
+            i._resolveDirections(updateDir=False, isDriven=isDriven)
             d = i._direction
             md = DIRECTION.asIntfDirection(i._masterDir)
             if d != INTF_DIRECTION.UNKNOWN:
@@ -36,11 +39,15 @@ class InterfaceDirectionFns():
                 allInSlaveConf = allInSlaveConf and isLikeInS
         return  (allInMasterConf, allInSlaveConf)  
             
-    def _resolveDirections(self, updateDir=True):
-        allM, allS = self.__directionProbe()
+    def _resolveDirections(self, updateDir=True, isDriven=None):
+        """
+        @param isDriven: function signal -> bool, if None signal is driven
+                         when it has drivers
+        """
+        allM, allS = self.__directionProbe(isDriven)
         
         if allM and allS and self._arrayElemCache:  # if direction is nod clear from this intf. and it has elems.
-            allM, allS = self._arrayElemCache[0].__directionProbe()
+            allM, allS = self._arrayElemCache[0].__directionProbe(isDriven)
 
         if allM and allS:
             self._direction = INTF_DIRECTION.UNKNOWN
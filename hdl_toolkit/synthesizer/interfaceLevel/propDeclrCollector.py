@@ -1,3 +1,4 @@
+from hdl_toolkit.synthesizer.elaborationProfiler import phase
 from hdl_toolkit.synthesizer.param import Param
 from hdl_toolkit.synthesizer.exceptions import IntfLvlConfErr
 from hdl_toolkit.synthesizer.interfaceLevel.mainBases import UnitBase, InterfaceBase 
@@ -161,7 +162,13 @@ class PropDeclrCollector(object):
                   (some components can change interface by parametrization)
         """
         self._registerUnit(uName, u)
-        u._loadDeclarations()
+        profiler = self._profiler
+        if profiler is None:
+            u._loadDeclarations()
+        else:
+            u._profiler = profiler
+            with phase(profiler.profileOf(u, self), "loadDeclarations"):
+                u._loadDeclarations()
         self._lazyLoaded.extend(u._toRtl())
         u._signalsForMyEntity(self._cntx, "sig_" + uName)
     
@@ -1,3 +1,5 @@
+from hdl_toolkit.hdlObjects.architecture import Architecture
+from hdl_toolkit.synthesizer.elaborationProfiler import phase
 from hdl_toolkit.synthesizer.exceptions import IntfLvlConfErr
 from hdl_toolkit.synthesizer.interfaceLevel.interfaceUtils.utils import forAllParams
 from hdl_toolkit.synthesizer.interfaceLevel.mainBases import UnitBase 
@@ -22,9 +24,13 @@ class Unit(UnitBase, PropDeclrCollector, UnitImplHelpers):
     @ivar _checkIntferfaces: flag - after synthesis check if interfaces are present 
     @ivar _lazyLoaded : container of rtl object which were lazy loaded in implementation phase
                       (this object has to be returned from _toRtl of parent before it it's own objects)
+    @ivar _elaborationCache: ElaborationCache used for this unit and its subunits (or None)
+    @ivar _profiler: ElaborationProfiler used for this unit and its subunits (or None)
     """
     
     _serializerMode = SERI_MODE.ALWAYS
+    _elaborationCache = None
+    _profiler = None
     
     def __init__(self):
         self._checkIntferfaces = True
@@ -41,25 +47,57 @@ class Unit(UnitBase, PropDeclrCollector, UnitImplHelpers):
         assert not self._wasSynthetised()
         
         self._initName()
+        profiler = self._profiler
+        if profiler is None:
+            prof = None
+        else:
+            prof = profiler.profileOf(self)
+            self._cntx.profile = prof
+            
         self._cntx.globals = self._globalsFromParams()
         externInterf = [] 
         
+        cache = self._elaborationCache
+        if cache is not None:
+            with phase(prof, "cacheLookup"):
+                cachedOutputs = cache.lookup(self)
+        else:
+            cachedOutputs = None
+        
         # prepare subunits
+        if cache is not None and cachedOutputs is None:
+            with phase(prof, "prefetch"):
+                cache.prefetch(self._units)
         for u in self._units:
+            u._elaborationCache = cache
+            u._profiler = profiler
+            if profiler is not None:
+                profiler.profileOf(u, self)
             yield from u._toRtl()
 
-        
-        for u in self._units:
-            subUnitName = u._name
-            u._signalsForMyEntity(self._cntx, "sig_" + subUnitName)
+        if cachedOutputs is not None:
+            # architecture is loaded from cache, subunits were loaded
+            # from cache as well (their keys are part of key of this unit)
+            for i in self._interfaces:
+                signals = i._signalsForInterface(self._cntx)
+                if i._isExtern:
+                    externInterf.extend(signals)
+            yield from self._synthetiseContext(externInterf, set(cachedOutputs))
+            return
 
-        # prepare signals for interfaces     
-        for i in self._interfaces:
-            signals = i._signalsForInterface(self._cntx)
-            if i._isExtern:
-                externInterf.extend(signals)
+        with phase(prof, "interfaceSignals"):
+            for u in self._units:
+                subUnitName = u._name
+                u._signalsForMyEntity(self._cntx, "sig_" + subUnitName)
+    
+            # prepare signals for interfaces     
+            for i in self._interfaces:
+                signals = i._signalsForInterface(self._cntx)
+                if i._isExtern:
+                    externInterf.extend(signals)
         
-        self._loadMyImplementations()
+        with phase(prof, "impl"):
+            self._loadMyImplementations()
         yield from self._lazyLoaded
 
         def forAllInterfaces(fn):
@@ -70,9 +108,9 @@ class Unit(UnitBase, PropDeclrCollector, UnitImplHelpers):
                 for i in u._interfaces:
                     if i._isExtern:
                         fn(i)
-                        
-        forAllInterfaces(lambda i : i._connectMyElems())
         
+        with phase(prof, "connectInterfaces"):
+            forAllInterfaces(lambda i : i._connectMyElems())
         
         if self._checkIntferfaces and not externInterf:
             raise  Exception("Can not find any external interface for unit " + self._name \
@@ -84,25 +122,41 @@ class Unit(UnitBase, PropDeclrCollector, UnitImplHelpers):
     def _wasSynthetised(self):
         return self._cntx.synthesised
     
-    def _synthetiseContext(self, externInterf):
-        # synthesize signal level context
-        s = self._cntx.synthesize(self._name, externInterf)
+    def _synthetiseContext(self, externInterf, cachedOutputs=None):
+        """
+        @param cachedOutputs: set of names of output ports if architecture
+                              is loaded from cache (netlist is not synthesized,
+                              only entity and empty architecture are built)
+        """
+        if cachedOutputs is None:
+            # synthesize signal level context
+            s = self._cntx.synthesize(self._name, externInterf)
+            isDriven = None
+        else:
+            ent = self._cntx.buildEntity(self._name, externInterf, cachedOutputs)
+            s = [ent, Architecture(ent)]
+            self._cntx.synthesised = True
+            isDriven = lambda sig: sig.name in cachedOutputs
         self._entity = s[0]
+        if self._elaborationCache is not None:
+            self._elaborationCache.registerEntity(self, self._entity)
         self._entity.__doc__ = self.__doc__
         self._entity.origin = self
 
         self._architecture = s[1]
     
-        for intf in self._interfaces: 
-            if intf._isExtern:
-                intf._resolveDirections()
-                # reverse because other components looks at this one from outside
-                intf._reverseDirection()
-        
-        # connect results of synthesized context to interfaces of this unit
-        for intf in self._interfaces:
-            if intf._isExtern:
-                self._connectMyInterfaceToMyEntity(intf)
+        prof = self._cntx.profile
+        with phase(prof, "connectEntity"):
+            for intf in self._interfaces: 
+                if intf._isExtern:
+                    intf._resolveDirections(isDriven=isDriven)
+                    # reverse because other components looks at this one from outside
+                    intf._reverseDirection()
+            
+            # connect results of synthesized context to interfaces of this unit
+            for intf in self._interfaces:
+                if intf._isExtern:
+                    self._connectMyInterfaceToMyEntity(intf)
         yield from s
             
         # after synthesis clean up interface so unit can be used elsewhere
@@ -133,8 +187,14 @@ class Unit(UnitBase, PropDeclrCollector, UnitImplHelpers):
             self.__loadInterface(i, True)
                 
         # if I am a unit load subunits    
+        profiler = self._profiler
         for u in self._units:
-            u._loadDeclarations()
+            if profiler is None:
+                u._loadDeclarations()
+            else:
+                u._profiler = profiler
+                with phase(profiler.profileOf(u, self), "loadDeclarations"):
+                    u._loadDeclarations()
             
     def _registerIntfInImpl(self, iName, intf):
         """
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from weakref import WeakKeyDictionary, WeakSet
+
+from hdl_toolkit.hdlObjects.operator import Operator
 from hdl_toolkit.hdlObjects.types.typeCast import toHVal
-from hdl_toolkit.synthesizer.rtlLevel.mainBases import RtlSignalBase
+from hdl_toolkit.synthesizer.rtlLevel.mainBases import RtlSignalBase, ParamVersion
 from hdl_toolkit.synthesizer.rtlLevel.rtlSignal import RtlSignal
 from hdl_toolkit.synthesizer.rtlLevel.signalUtils.cmp import areSameSignals
 
@@ -56,6 +59,7 @@ class Param(RtlSignal):
             
         
         self.replacedWith = replaceWith
+        self._invalidateDependents()
     
 
     def set(self, val):
@@ -66,6 +70,15 @@ class Param(RtlSignal):
         val = toHVal(val)
         self.defaultVal = val
         self._val = val.staticEval()
+        self._invalidateDependents()
+
+    def _invalidateDependents(self):
+        """
+        Remove cached values of expressions which are using this param
+        """
+        ParamVersion.actual += 1
+        for e in _dependents.pop(self, ()):
+            _evalCache.pop(e, None)
     
     def __repr__(self):
         val = "InvalidVal"
@@ -82,15 +95,73 @@ class Param(RtlSignal):
         return "<%s, name=%s, val=%s>" % (self.__class__.__name__, name, str(val)) 
         
 
+# {expression: value} values of expressions made of Params and Values
+# (weak references, so cache does not keep netlists of finished elaborations alive)
+_evalCache = WeakKeyDictionary()
+# {Param: WeakSet of expressions from _evalCache which are using it}
+_dependents = WeakKeyDictionary()
+
+def _paramDeps(expr):
+    """
+    Walk expression and collect Params which it is using
+    
+    @return: set of Params or None if expression is using something else
+        than Params, Values and operators (value can not be cached)
+    """
+    deps = set()
+    seen = set()
+    toSearch = [expr]
+    while toSearch:
+        s = toSearch.pop()
+        if s in seen:
+            continue
+        seen.add(s)
+        
+        if isinstance(s, Param):
+            deps.add(s)
+            v = s._val
+            if isinstance(v, RtlSignalBase):
+                toSearch.append(v)
+            continue
+        
+        if s.ctx is not None or not s.drivers:
+            return None
+        for d in s.drivers:
+            if not isinstance(d, Operator):
+                return None
+            for o in d.ops:
+                if isinstance(o, RtlSignalBase):
+                    toSearch.append(o)
+    
+    return deps
+
 def evalParam(p):
     """
     Get value of parameter
+    
+    Values of expressions made of Params are cached until
+    some of used Params is set or replaced (copy of cached value is returned)
     """
     while isinstance(p, Param):
         p = p.get()
     
     if isinstance(p, RtlSignalBase):
-        return p.staticEval()
+        try:
+            return _evalCache[p].clone()
+        except KeyError:
+            pass
+        
+        v = p.staticEval()
+        deps = _paramDeps(p)
+        if deps is not None:
+            _evalCache[p] = v
+            v = v.clone()
+            for d in deps:
+                try:
+                    _dependents[d].add(p)
+                except KeyError:
+                    _dependents[d] = WeakSet([p])
+        return v
         # use rather param inheritance instead of param as param value
     return toHVal(p)
 
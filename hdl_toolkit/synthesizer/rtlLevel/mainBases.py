@@ -1,5 +1,14 @@
 class RtlSignalBase():
-    pass
+    __slots__ = ()
 
 class RtlMemoryBase(RtlSignalBase):
-    pass
\ No newline at end of file
+    pass
+
+
+class ParamVersion():
+    """
+    Counter of changes of Param values, values derived from params
+    (f.e. resolved widths of types) are cached only for actual version
+    """
+    actual = 0
+
@@ -3,16 +3,19 @@ from hdl_toolkit.hdlObjects.assignment import Assignment
 from hdl_toolkit.hdlObjects.entity import Entity
 from hdl_toolkit.hdlObjects.operator import Operator
 from hdl_toolkit.hdlObjects.process import HWProcess
+from hdl_toolkit.hdlObjects.specialValues import DIRECTION
 from hdl_toolkit.hdlObjects.statements import IfContainer, WaitStm, \
     SwitchContainer
 from hdl_toolkit.hdlObjects.types.defs import BIT
 from hdl_toolkit.hdlObjects.value import Value
 from hdl_toolkit.synthesizer.assigRenderer import renderIfTree
 from hdl_toolkit.synthesizer.codeOps import If
+from hdl_toolkit.synthesizer.elaborationProfiler import phase
 from hdl_toolkit.synthesizer.exceptions import SigLvlConfErr
 from hdl_toolkit.synthesizer.interfaceLevel.mainBases import InterfaceBase
 from hdl_toolkit.synthesizer.rtlLevel.memory import RtlSyncSignal
-from hdl_toolkit.synthesizer.rtlLevel.optimalizator import removeUnconnectedSignals
+from hdl_toolkit.synthesizer.rtlLevel.optimalizator import removeUnconnectedSignals, \
+    mergeEqualOperators, simplifyOperators
 from hdl_toolkit.synthesizer.rtlLevel.rtlSignal import RtlSignal
 from hdl_toolkit.synthesizer.rtlLevel.signalUtils.exceptions import MultipleDriversExc
 from hdl_toolkit.synthesizer.rtlLevel.signalUtils.walkers import discoverSensitivity
@@ -76,6 +79,13 @@ class RtlNetlist():
     @ivar signals: dict of all signals in context
     @ivar startsOfDataPaths:  is set of nodes where datapaths starts
     @ivar subUnits:           is set of all units in this context 
+    @ivar opCache:            dict {operatorKey: result signal} used for sharing
+                              of identical operators in whole netlist
+    @ivar removedStats:       RemovedStats of unused objects removed in synthesize()
+    @ivar mergedOps:          number of duplicit operators merged in synthesize()
+    @ivar simplifiedOps:      number of operators simplified in synthesize()
+    @ivar profile:            UnitProfile where times of phases of synthesize()
+                              are recorded (None = disabled)
     """
     def __init__(self):
         self.globals = {}
@@ -83,6 +93,11 @@ class RtlNetlist():
         self.startsOfDataPaths = set()
         self.subUnits = set()
         self.synthesised = False
+        self.opCache = {}
+        self.removedStats = None
+        self.mergedOps = 0
+        self.simplifiedOps = 0
+        self.profile = None
 
     
     def sig(self, name, typ=BIT, clk=None, syncRst=None, defVal=None):
@@ -131,6 +146,7 @@ class RtlNetlist():
         assigments = where(self.startsOfDataPaths,
                             lambda x: isinstance(x, Assignment)
                           )
+        prof = self.profile
         for sig, dps in groupedby(assigments, lambda x: x.dst):
             dps = list(dps)
             name = ""
@@ -140,7 +156,9 @@ class RtlNetlist():
             
             # render sequential statements in process
             # (conversion from netlist to statements)
-            for stm in renderIfTree(dps):
+            with phase(prof, "renderIfTree"):
+                stms = list(renderIfTree(dps))
+            for stm in stms:
                 p = HWProcess("assig_process_" + name)
                 if sig._useNopVal and not isEnclosed(stm):
                     n = sig._nopVal
@@ -149,10 +167,12 @@ class RtlNetlist():
                         p.sensitivityList.add(n)
                     
                 p.statements.append(stm)
-                sensitivity = discoverSensitivity(stm)
-                p.sensitivityList.update(sensitivity)
+                with phase(prof, "discoverSensitivity"):
+                    p.sensitivityList.update(discoverSensitivity(stm))
                 for s in p.sensitivityList:
-                    s.hidden = False
+                    # sensitivity can contain also event operators
+                    if isinstance(s, RtlSignal):
+                        s.hidden = False
 
                 yield p
 
@@ -166,16 +186,20 @@ class RtlNetlist():
         self.signals.update(other.signals)
         self.startsOfDataPaths.update(other.startsOfDataPaths)
         self.subUnits.update(other.subUnits)
+        for k, v in other.opCache.items():
+            self.opCache.setdefault(k, v)
         
         for s in other.signals:
             s.ctx = self
         
 
-    def synthesize(self, name, interfaces):
-        """
-        Build Entity and architecture out of netlist representation
+    def buildEntity(self, name, interfaces, outputs=None):
         """
+        Build Entity with generics from globals and ports from interfaces
         
+        @param outputs: set of names of output ports, if None directions
+                        of ports are resolved from drivers of signals
+        """
         ent = Entity(name)
         ent._name = name + "_inst"  # instance name
 
@@ -185,16 +209,52 @@ class RtlNetlist():
         
         # create ports
         for s in interfaces:
-            pi = portItemfromSignal(s, ent)
+            if outputs is None:
+                d = None
+            elif s.name in outputs:
+                d = DIRECTION.OUT
+            else:
+                d = DIRECTION.IN
+            pi = portItemfromSignal(s, ent, d)
             pi.reigsterInternSig(s)
             ent.ports.append(pi)
+        
+        return ent
 
-        removeUnconnectedSignals(self)
+    def synthesize(self, name, interfaces):
+        """
+        Build Entity and architecture out of netlist representation
+        """
+        ent = self.buildEntity(name, interfaces)
+
+        prof = self.profile
+        with phase(prof, "simplifyOperators"):
+            self.simplifiedOps = simplifyOperators(self)
+        with phase(prof, "mergeEqualOperators"):
+            self.mergedOps = mergeEqualOperators(self)
+        with phase(prof, "removeUnconnectedSignals"):
+            self.removedStats = removeUnconnectedSignals(self, keep=set(interfaces))
+        
+        if prof is not None:
+            operators = 0
+            assignments = 0
+            for s in self.signals:
+                for d in s.drivers:
+                    if isinstance(d, Operator):
+                        if d.result is s:
+                            operators += 1
+                    elif isinstance(d, Assignment):
+                        assignments += 1
+            prof.counts["signals"] = len(self.signals)
+            prof.counts["operators"] = operators
+            prof.counts["assignments"] = assignments
         
         arch = Architecture(ent)
         for p in self.buildProcessesOutOfAssignments():
             arch.processes.append(p)
             
+        if prof is not None:
+            prof.counts["processes"] = len(arch.processes)
 
         # add signals, variables etc. in architecture
         for s in self.signals:
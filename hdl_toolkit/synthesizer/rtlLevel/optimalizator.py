@@ -1,21 +1,408 @@
+from collections import deque
 
+from hdl_toolkit.hdlObjects.assignment import Assignment
+from hdl_toolkit.hdlObjects.operator import Operator
+from hdl_toolkit.hdlObjects.operatorDefs import AllOps, isEventDependentOp
+from hdl_toolkit.hdlObjects.portItem import PortItem
+from hdl_toolkit.hdlObjects.types.bits import Bits
+from hdl_toolkit.hdlObjects.value import Value
+from hdl_toolkit.synthesizer.rtlLevel.mainBases import RtlSignalBase
 
-def removeUnconnectedSignals(netlist):
-    
-    toDelete = set()
-    while True:
-        for sig in netlist.signals:
-            if not sig.endpoints:
-                try:
-                    if sig._interface is not None:
-                        continue
-                except AttributeError:
-                    pass
-                toDelete.add(sig)
-                
-        if toDelete:        
-            for sig in toDelete:
-                netlist.signals.remove(sig)
-            toDelete = set()
+
+class RemovedStats():
+    """
+    Numbers of objects removed by removeUnconnectedSignals
+    """
+    __slots__ = ["signals", "operators", "assignments"]
+
+    def __init__(self):
+        self.signals = 0
+        self.operators = 0
+        self.assignments = 0
+
+    def __repr__(self):
+        return "<RemovedStats signals:%d, operators:%d, assignments:%d>" % (
+            self.signals, self.operators, self.assignments)
+
+
+def _indexSignals(assignment):
+    if assignment.indexes:
+        for i in assignment.indexes:
+            if isinstance(i, RtlSignalBase):
+                yield i
+
+
+def _isUnconnected(sig, indexRefs):
+    if sig.endpoints or indexRefs.get(sig, 0):
+        return False
+    try:
+        if sig._interface is not None:
+            return False
+    except AttributeError:
+        pass
+    for d in sig.drivers:
+        # signals driven by port of subunit etc. has to stay
+        if not isinstance(d, (Operator, Assignment)):
+            return False
+    return True
+
+
+def _disconnectOperator(op):
+    """
+    Remove operator from endpoints of its operands
+
+    @return: list of operands which lost endpoint
+    """
+    inputs = []
+    res = op.result
+    for o in op.ops:
+        if isinstance(o, RtlSignalBase):
+            if o.endpoints.discard(op):
+                inputs.append(o)
+            # operator can not be reused anymore
+            usedOps = o._usedOps
+            if usedOps:
+                for k, v in list(usedOps.items()):
+                    if v is res:
+                        del usedOps[k]
+    return inputs
+
+
+def _disconnectAssignment(a, netlist, indexRefs):
+    """
+    Remove assignment from netlist and from endpoints of its inputs
+
+    @return: list of inputs which lost endpoint
+    """
+    netlist.startsOfDataPaths.discard(a)
+    inputs = []
+    src = a.src
+    if isinstance(src, RtlSignalBase) and src.endpoints.discard(a):
+        inputs.append(src)
+    for c in a.cond:
+        if c.endpoints.discard(a):
+            inputs.append(c)
+    for i in _indexSignals(a):
+        indexRefs[i] -= 1
+        inputs.append(i)
+    return inputs
+
+
+def removeUnconnectedSignals(netlist, keep=()):
+    """
+    Remove signals which are not used (have no endpoints) together with
+    operators and assignments which are driving them. Inputs of removed
+    drivers are checked again, so whole unused expressions and chains
+    of signals are removed in single pass.
+
+    @param keep: signals which can not be removed (f.e. ports)
+    @return: RemovedStats
+    """
+    stats = RemovedStats()
+    signals = netlist.signals
+
+    # signals used as index in assignments are not endpoints of them
+    indexRefs = {}
+    for stm in netlist.startsOfDataPaths:
+        if isinstance(stm, Assignment):
+            for i in _indexSignals(stm):
+                indexRefs[i] = indexRefs.get(i, 0) + 1
+
+    worklist = deque(signals)
+    while worklist:
+        sig = worklist.popleft()
+        if sig not in signals or sig in keep or not _isUnconnected(sig, indexRefs):
+            continue
+
+        signals.remove(sig)
+        stats.signals += 1
+        for d in sig.drivers:
+            if isinstance(d, Operator):
+                worklist.extend(_disconnectOperator(d))
+                stats.operators += 1
+            else:
+                worklist.extend(_disconnectAssignment(d, netlist, indexRefs))
+                stats.assignments += 1
+        sig.drivers.clear()
+
+    return stats
+
+
+def _canReplaceIn(endpoint):
+    return isinstance(endpoint, (Operator, Assignment, PortItem))
+
+
+def _replaceOperand(op, old, new):
+    """
+    Replace operand old of operator by new (signal or value)
+    """
+    op.ops = [new if o is old else o for o in op.ops]
+    if isinstance(old, RtlSignalBase):
+        old.endpoints.discard(op)
+    if isinstance(new, RtlSignalBase):
+        new.endpoints.append(op)
+
+
+def _replaceIn(endpoint, old, new):
+    """
+    Replace signal old by signal new in endpoint
+    """
+    if isinstance(endpoint, Operator):
+        _replaceOperand(endpoint, old, new)
+    elif isinstance(endpoint, Assignment):
+        if endpoint.src is old:
+            endpoint.src = new
+        if old in endpoint.cond:
+            endpoint.cond.remove(old)
+            endpoint.cond.add(new)
+    else:
+        if endpoint.src is old:
+            endpoint.src = new
+
+
+def _mergeSignal(old, new):
+    """
+    Move all endpoints of signal old to signal new
+    """
+    for ep in list(old.endpoints):
+        _replaceIn(ep, old, new)
+        new.endpoints.append(ep)
+    old.endpoints.clear()
+    new.hidden = new.hidden and old.hidden
+
+    for o in old.origin.ops:
+        if isinstance(o, RtlSignalBase):
+            usedOps = o._usedOps
+            if usedOps:
+                for k, v in list(usedOps.items()):
+                    if v is old:
+                        usedOps[k] = new
+
+
+def mergeEqualOperators(netlist):
+    """
+    Common subexpression elimination, operators with same operator,
+    operands (commutative operators in any order) and result type are merged
+    and endpoints of duplicit results are connected to the first one.
+    Operators which are using merged result are checked again.
+    Duplicit operators stay unconnected and are removed
+    by removeUnconnectedSignals.
+
+    @return: number of merged operators
+    """
+    table = {}
+    # {operator: key under which it is stored in table}
+    keys = {}
+    merged = 0
+
+    worklist = deque()
+    for sig in sorted(netlist.signals, key=lambda s: s._instId):
+        for d in sig.drivers:
+            if isinstance(d, Operator) and d.result is sig:
+                worklist.append(d)
+
+    while worklist:
+        op = worklist.popleft()
+        res = op.result
+        if not res.endpoints or len(res.drivers) != 1 or res not in netlist.signals:
+            # unused (or already merged) results are removed later
+            continue
+
+        oldKey = keys.pop(op, None)
+        if oldKey is not None and table.get(oldKey) is res:
+            del table[oldKey]
+
+        k = op.structuralKey()
+        if k is None:
+            continue
+
+        other = table.get(k)
+        if other is None or other is res:
+            table[k] = res
+            keys[op] = k
+            continue
+
+        if not all(_canReplaceIn(ep) for ep in res.endpoints):
+            continue
+
+        for ep in res.endpoints:
+            if isinstance(ep, Operator):
+                worklist.append(ep)
+        _mergeSignal(res, other)
+        merged += 1
+
+    return merged
+
+
+def _isValidBitsVal(v):
+    return isinstance(v, Value) and isinstance(v._dtype, Bits) \
+        and v.vldMask == v._dtype.all_mask()
+
+
+def _singleDriverOp(sig, opDef):
+    if isinstance(sig, RtlSignalBase) and len(sig.drivers) == 1:
+        d = sig.drivers[0]
+        if isinstance(d, Operator) and d.operator == opDef and d.result is sig:
+            return d
+    return None
+
+
+def _foldConstants(op):
+    """
+    Evaluate operator with all operands constant
+    """
+    if isEventDependentOp(op.operator) or op.operator == AllOps.CALL:
+        return None
+    try:
+        v = op.operator.eval(op)
+    except (TypeError, ValueError, AssertionError, NotImplementedError, AttributeError):
+        return None
+    if isinstance(v, Value) and v._dtype == op.result._dtype:
+        return v
+    return None
+
+
+def _simplifyBitOp(op):
+    """
+    Identity and absorption rules of AND, OR, XOR, ADD, SUB
+    (x & 0 = 0, x & 1..1 = x, x | 0 = x, x | 1..1 = 1..1, x & x = x ...)
+    """
+    o = op.operator
+    resT = op.result._dtype
+    a, b = op.ops
+    if a is b and o in (AllOps.AND_LOG, AllOps.OR_LOG):
+        return a
+
+    for x, c in ((a, b), (b, a)):
+        if not _isValidBitsVal(c):
+            continue
+        sameT = isinstance(x, RtlSignalBase) and x._dtype == resT
+        if c.val == 0:
+            if o == AllOps.AND_LOG:
+                return resT.fromPy(0)
+            elif o in (AllOps.OR_LOG, AllOps.XOR, AllOps.ADD) and sameT:
+                return x
+            elif o == AllOps.SUB and c is b and sameT:
+                return x
+        elif c.val == c._dtype.all_mask():
+            if o == AllOps.AND_LOG and sameT:
+                return x
+            elif o == AllOps.OR_LOG:
+                return resT.fromPy(resT.all_mask())
+    return None
+
+
+_SIGN_CASTS = (AllOps.BitsAsSigned, AllOps.BitsAsUnsigned, AllOps.BitsAsVec)
+
+
+def _simplifyOperator(op):
+    """
+    @return: Value or signal which can replace result of operator
+             or None if operator can not be simplified
+    """
+    o = op.operator
+    ops = op.ops
+    resT = op.result._dtype
+    if all(isinstance(x, Value) for x in ops):
+        return _foldConstants(op)
+
+    if o == AllOps.NOT:
+        # double negation
+        d = _singleDriverOp(ops[0], AllOps.NOT)
+        if d is not None and d.ops[0]._dtype == resT:
+            return d.ops[0]
+    elif o in _SIGN_CASTS:
+        # sign cast back to original type (vec(unsigned(x)))
+        for castOp in _SIGN_CASTS:
+            d = _singleDriverOp(ops[0], castOp)
+            if d is not None and d.ops[0]._dtype == resT:
+                return d.ops[0]
+    elif o == AllOps.TERNARY:
+        cond, ifTrue, ifFalse = ops
+        if isinstance(cond, Value) and cond.vldMask:
+            v = ifTrue if cond.val else ifFalse
+            if v._dtype == resT:
+                return v
+    elif len(ops) == 2 and isinstance(resT, Bits) and o in (
+            AllOps.AND_LOG, AllOps.OR_LOG, AllOps.XOR, AllOps.ADD, AllOps.SUB):
+        return _simplifyBitOp(op)
+
+    return None
+
+
+def _replaceResult(res, new):
+    """
+    Replace result of operator res by value or signal new in its endpoints,
+    endpoints which can not use value (conditions of assignments, ports)
+    stay connected to res
+
+    @return: list of operators which were using res
+    """
+    isSig = isinstance(new, RtlSignalBase)
+    changed = []
+    for ep in list(res.endpoints):
+        if isinstance(ep, Operator):
+            _replaceOperand(ep, res, new)
+            changed.append(ep)
+            usedOps = res._usedOps
+            if usedOps:
+                for k, v in list(usedOps.items()):
+                    if v is ep.result:
+                        del usedOps[k]
+            continue
+        elif isinstance(ep, Assignment):
+            if ep.src is res:
+                ep.src = new
+            if res in ep.cond:
+                if not isSig:
+                    continue
+                ep.cond.remove(res)
+                ep.cond.add(new)
+        elif isinstance(ep, PortItem) and isSig:
+            ep.src = new
         else:
-            return
\ No newline at end of file
+            continue
+
+        res.endpoints.discard(ep)
+        if isSig:
+            new.endpoints.append(ep)
+
+    return changed
+
+
+def simplifyOperators(netlist):
+    """
+    Constant folding and algebraic simplification of operators,
+    operators with constant operands are evaluated by Value operator
+    implementations, identity and absorption rules are applied
+    on operators with constant operand (x & 0, x | 0, x ^ 0, ~~x ...).
+    Results of simplified operators are replaced in their endpoints
+    and users of them are checked again. Simplified operators stay
+    unconnected and are removed by removeUnconnectedSignals.
+
+    Params are not folded because they are generics of entity.
+
+    @return: number of simplified operators
+    """
+    simplified = 0
+    worklist = deque()
+    for sig in sorted(netlist.signals, key=lambda s: s._instId):
+        for d in sig.drivers:
+            if isinstance(d, Operator) and d.result is sig:
+                worklist.append(d)
+
+    while worklist:
+        op = worklist.popleft()
+        res = op.result
+        if not res.endpoints or len(res.drivers) != 1 or res not in netlist.signals:
+            continue
+
+        new = _simplifyOperator(op)
+        if new is None or new is res:
+            continue
+
+        worklist.extend(_replaceResult(res, new))
+        simplified += 1
+
+    return simplified
+
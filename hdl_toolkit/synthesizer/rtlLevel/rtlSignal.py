@@ -12,17 +12,25 @@ class RtlSignal(RtlSignalBase, SignalItem, RtlSignalOps):
     """
     more like net
     @ivar _usedOps: dictionary of used operators which can be reused
-    @ivar endpoints: UniqList of operators and statements for which this signal is driver.
-    @ivar drivers: UniqList of operators and statements which can drive this signal.
+                    (None until first operator is used)
+    @ivar endpoints: UniqList (not list) of operators and statements for which this signal is driver.
+    @ivar drivers: UniqList (not list) of operators and statements which can drive this signal.
     @ivar negated: this value represents that the value of signal has opposite meaning
            [TODO] mv negated to Bits hdl type.
     @ivar hiden: means that this signal is part of expression and should not be rendered 
     @ivar processCrossing: means that this signal is crossing process boundary
     
+    @ivar origin: operator which is driving this signal if signal is result
+                  of operator (not set for other signals)
+    
     @cvar __instCntr: counter used for generating instance ids
     @ivar _instId: internaly used only for intuitive sorting of statements
     """
     __instCntr = 0
+    # there are millions of signals in large designs, attributes are in slots
+    __slots__ = ["ctx", "hasGenericName", "endpoints", "drivers", "_usedOps",
+                 "negated", "hidden", "_instId", "_nopVal", "_useNopVal",
+                 "origin", "_interface"]
 
     def __init__(self, ctx, name, dtype, defaultVal=None, nopVal=None, useNopVal=False):
         """
@@ -50,7 +58,7 @@ class RtlSignal(RtlSignalBase, SignalItem, RtlSignalOps):
         # set can not be used because hash of items are changign
         self.endpoints = UniqList()
         self.drivers = UniqList()
-        self._usedOps = {}
+        self._usedOps = None
         self.negated = False
         self.hidden = True
         self._instId = RtlSignal._nextInstId()
@@ -59,6 +67,13 @@ class RtlSignal(RtlSignalBase, SignalItem, RtlSignalOps):
         self._useNopVal = useNopVal 
 
     
+    def _setDefValue(self):
+        # _oldVal is used only by simulator signals
+        v = self.defaultVal
+        if isinstance(v, RtlSignalBase):
+            v = v.staticEval()
+        self._val = v.clone()
+
     @classmethod
     def _nextInstId(cls):
         """
@@ -15,16 +15,21 @@ def tv(signal):
     return signal._dtype.getValueCls()
 
 class RtlSignalOps():
+    __slots__ = ()
+
     def _convert(self, toT):
         return tv(self)._convert(self, toT)
     
     def naryOp(self, operator, opCreateDelegate, *otherOps):
         k = (operator, *otherOps)
+        usedOps = self._usedOps
+        if usedOps is None:
+            usedOps = self._usedOps = {}
         try:
-            return self._usedOps[k]
+            return usedOps[k]
         except KeyError:
             o = opCreateDelegate(self, *otherOps)
-            self._usedOps[k] = o
+            usedOps[k] = o
             return o
         
         return o
@@ -113,11 +118,14 @@ class RtlSignalOps():
         else:
             hashableKey = key
         k = (operator, hashableKey)
+        usedOps = self._usedOps
+        if usedOps is None:
+            usedOps = self._usedOps = {}
         try:
-            return self._usedOps[k]
+            return usedOps[k]
         except KeyError:
             o = tv(self).__getitem__(self, key)
-            self._usedOps[k] = o
+            usedOps[k] = o
             return o  
         
         return o
@@ -3,11 +3,15 @@ from hdl_toolkit.hdlObjects.specialValues import DIRECTION
 from hdl_toolkit.synthesizer.rtlLevel.signalUtils.walkers import signalHasDriver
 
 
-def portItemfromSignal(s, entity):
-    if signalHasDriver(s):
-        d = DIRECTION.OUT
-    else:
-        d = DIRECTION.IN
+def portItemfromSignal(s, entity, d=None):
+    """
+    @param d: direction of port, resolved from drivers of signal if None
+    """
+    if d is None:
+        if signalHasDriver(s):
+            d = DIRECTION.OUT
+        else:
+            d = DIRECTION.IN
     pi = PortItem(s.name, d, s._dtype, entity)
     if not hasattr(s, '_interface'):
         from hdl_toolkit.interfaces.std import Signal
@@ -10,21 +10,65 @@ from hdl_toolkit.hdlObjects.entity import Entity
 
 from hdl_toolkit.serializer.exceptions import SerializerException
 from hdl_toolkit.serializer.vhdlSerializer import VhdlSerializer
+from hdl_toolkit.synthesizer.elaborationProfiler import phase
 from hdl_toolkit.synthesizer.interfaceLevel.unit import Unit
 from hdl_toolkit.synthesizer.uniqList import UniqList
 
-def toRtl(unitOrCls, name=None, serializer=VhdlSerializer):
+def _profileOf(profiler, obj):
     """
-    convert unit to rtl string using specified serializer
+    @return: UnitProfile of unit which serialized object belongs to (or None)
     """
-    if not isinstance(unitOrCls, Unit):
-        u = unitOrCls()
+    if profiler is None:
+        return None
+    if isinstance(obj, Entity):
+        unit = getattr(obj, "origin", None)
+    elif isinstance(obj, Architecture):
+        unit = getattr(obj.entity, "origin", None)
+    else:
+        unit = None
+    if unit is None:
+        return None
+    return profiler.profileOf(unit)
+
+def _checkElaboratedArgs(elaborated, name, cache):
+    if elaborated is not None and (name is not None or cache is not None):
+        raise ValueError("name and cache can not be used for already elaborated unit")
+
+def _loadDeclarations(unit, profiler):
+    if profiler is None:
+        prof = None
     else:
-        u = unitOrCls
+        unit._profiler = profiler
+        prof = profiler.profileOf(unit)
+    with phase(prof, "loadDeclarations"):
+        unit._loadDeclarations()
+
+def toRtl(unitOrCls, name=None, serializer=VhdlSerializer, cache=None, elaborated=None,
+          profiler=None):
+    """
+    convert unit to rtl string using specified serializer
     
-    u._loadDeclarations()
-    if name is not None:
-        u._name = name
+    @param cache: ElaborationCache, units found in it are not elaborated
+    @param elaborated: objects produced by _toRtl of already elaborated unit
+                       (f.e. from loadElaborated), unit is not elaborated again
+                       (name and cache can not be specified together with it)
+    @param profiler: ElaborationProfiler where times of phases of elaboration
+                     and serialization are recorded
+    """
+    _checkElaboratedArgs(elaborated, name, cache)
+    if elaborated is None:
+        if not isinstance(unitOrCls, Unit):
+            u = unitOrCls()
+        else:
+            u = unitOrCls
+        
+        _loadDeclarations(u, profiler)
+        if name is not None:
+            u._name = name
+        if cache is not None:
+            cache.serializer = serializer
+            u._elaborationCache = cache
+        elaborated = u._toRtl()
     
     globScope = serializer.getBaseNameScope()
     codeBuff = []
@@ -38,23 +82,27 @@ def toRtl(unitOrCls, name=None, serializer=VhdlSerializer):
     serializedConfiguredUnits = {}
     
     doSerialize = True
-    for obj in u._toRtl():
+    for obj in elaborated:
         doSerialize = serializer.serializationDecision(obj, serializedClasses, serializedConfiguredUnits)
         if doSerialize:
-            if isinstance(obj, Entity):
-                s = globScope.fork(1)
-                s.setLevel(2)
-                mouduleScopes[obj] = s
-                sc = serializer.Entity(obj, s)
-            elif isinstance(obj, Architecture):
-                try:
-                    s = mouduleScopes[obj.entity]
-                except KeyError:
-                    raise SerializerException("Entity should be serialized before architecture of %s" % 
-                                              (obj.getEntityName()))
-                sc = serializer.Architecture(obj, s)
-            else:
-                sc = serializer.asHdl(obj)
+            with phase(_profileOf(profiler, obj), "serialize"):
+                if isinstance(obj, Entity):
+                    s = globScope.fork(1)
+                    s.setLevel(2)
+                    mouduleScopes[obj] = s
+                    sc = serializer.Entity(obj, s)
+                elif isinstance(obj, Architecture):
+                    try:
+                        s = mouduleScopes[obj.entity]
+                    except KeyError:
+                        raise SerializerException("Entity should be serialized before architecture of %s" % 
+                                                  (obj.getEntityName()))
+                    if cache is None:
+                        sc = serializer.Architecture(obj, s)
+                    else:
+                        sc = cache.Architecture(obj, s)
+                else:
+                    sc = serializer.asHdl(obj)
         
             codeBuff.append(sc)
         else:
@@ -79,12 +127,19 @@ def synthesised(u):
     return u
 
 # [TODO] merge toRtlAndSave and toRtl
-def toRtlAndSave(unit, folderName='.', name=None, serializer=VhdlSerializer):
-    unit._loadDeclarations()
+def toRtlAndSave(unit, folderName='.', name=None, serializer=VhdlSerializer, cache=None,
+                 elaborated=None, profiler=None):
+    _checkElaboratedArgs(elaborated, name, cache)
     os.makedirs(folderName, exist_ok=True)
     files = UniqList()
-    if name is not None:
-        unit._name = name
+    if elaborated is None:
+        _loadDeclarations(unit, profiler)
+        if name is not None:
+            unit._name = name
+        if cache is not None:
+            cache.serializer = serializer
+            unit._elaborationCache = cache
+        elaborated = unit._toRtl()
         
     globScope = serializer.getBaseNameScope()
     mouduleScopes = {}
@@ -97,49 +152,53 @@ def toRtlAndSave(unit, folderName='.', name=None, serializer=VhdlSerializer):
     serializedConfiguredUnits = {}
     
     doSerialize = True
-    for obj in unit._toRtl():
+    for obj in elaborated:
         doSerialize = serializer.serializationDecision(obj, serializedClasses, serializedConfiguredUnits)
         if doSerialize:
-            if isinstance(obj, Entity):
-                # we need to serialize before we take name, before name can change
-                s = globScope.fork(1)
-                s.setLevel(2)
-                mouduleScopes[obj] = s
+            with phase(_profileOf(profiler, obj), "serialize"):
+                if isinstance(obj, Entity):
+                    # we need to serialize before we take name, before name can change
+                    s = globScope.fork(1)
+                    s.setLevel(2)
+                    mouduleScopes[obj] = s
                 
-                sc = serializer.Entity(obj, s)
-                fName = obj.name + serializer.fileExtension
-                fileMode = 'w'
+                    sc = serializer.Entity(obj, s)
+                    fName = obj.name + serializer.fileExtension
+                    fileMode = 'w'
                 
-            elif isinstance(obj, Architecture):
-                try:
-                    s = mouduleScopes[obj.entity]
-                except KeyError:
-                    raise SerializerException("Entity should be serialized before architecture of %s" % 
-                                              (obj.getEntityName()))
-                sc = serializer.Architecture(obj, s)
-                fName = obj.getEntityName() + serializer.fileExtension
-                fileMode = 'a'
-            else:
-                if hasattr(obj, "_hdlSources"):
-                    fName = None
-                    for fn in obj._hdlSources:
-                        if isinstance(fn, str):
-                            shutil.copy2(fn, folderName)
-                            files.append(fn)
+                elif isinstance(obj, Architecture):
+                    try:
+                        s = mouduleScopes[obj.entity]
+                    except KeyError:
+                        raise SerializerException("Entity should be serialized before architecture of %s" % 
+                                                  (obj.getEntityName()))
+                    if cache is None:
+                        sc = serializer.Architecture(obj, s)
+                    else:
+                        sc = cache.Architecture(obj, s)
+                    fName = obj.getEntityName() + serializer.fileExtension
+                    fileMode = 'a'
                 else:
-                    sc = serializer.asHdl(obj)   
+                    if hasattr(obj, "_hdlSources"):
+                        fName = None
+                        for fn in obj._hdlSources:
+                            if isinstance(fn, str):
+                                shutil.copy2(fn, folderName)
+                                files.append(fn)
+                    else:
+                        sc = serializer.asHdl(obj)   
     
-            if fName is not None:
-                fp = os.path.join(folderName, fName)
-                files.append(fp)
+                if fName is not None:
+                    fp = os.path.join(folderName, fName)
+                    files.append(fp)
                 
-                with open(fp, fileMode) as f:
-                    if fileMode == 'a':
-                        f.write("\n")
-                    f.write(
-                        serializer.formater(sc)
-                        )
-    return files
+                    with open(fp, fileMode) as f:
+                        if fileMode == 'a':
+                            f.write("\n")
+                        f.write(
+                            serializer.formater(sc)
+                            )
+    return list(files)
 
 
 def serializeAsIpcore(unit, folderName=".", name=None, serializer=VhdlSerializer):
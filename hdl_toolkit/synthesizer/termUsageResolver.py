@@ -51,8 +51,9 @@ def buildTermMapFromConditions(assignments):
     def registerToMap(assigment):
         # walk all assignments and register them in term map
         # cond is set of term in conjunctive form
-        for realC, isNegated in assigment._unresolvedConds:
-            insertToMap(realC, assigment, isNegated)
+        for realC, negFlags in assigment._unresolvedConds.items():
+            for isNegated in negFlags:
+                insertToMap(realC, assigment, isNegated)
             
     # resolve main hierarchy of conditions
     for a in assignments:
@@ -82,52 +83,63 @@ class TermUsageRecord(object):
         self.maxStmId = maxStmId
     
     
+def prepareUnresolvedConds(assignment):
+    """
+    Set _unresolvedConds of assignment to dict {base cond: list of negated flags}
+    (cond can be used in both forms, which is detected later in if tree rendering)
+    """
+    unresolved = {}
+    for c in assignment.cond:
+        realC, isNegated = getBaseCond(c)
+        try:
+            unresolved[realC].append(isNegated)
+        except KeyError:
+            unresolved[realC] = [isNegated]
+    assignment._unresolvedConds = unresolved
+
+
 def extractCondTermOrder(assignments):
-            # register assignments in tree of IfTreeNodes
+    # register assignments in tree of IfTreeNodes
     for a in assignments:
         # prepare base conds
-        a._unresolvedConds = [ getBaseCond(c) for c in a.cond ]
+        prepareUnresolvedConds(a)
     
     termMap = buildTermMapFromConditions(assignments)
     cntTerms = countCondOccurrences(termMap)
     yield from sortCondsByMostImpact(cntTerms)
 
-class TermResolveReport():
-    def __init__(self, usageCnt, maxStmId):
-        self.usageCnt = usageCnt
-        self.maxStmId = maxStmId
 
+def countTermUsage(assignments, termUsage=None, sign=1):
+    """
+    Add (or subtract if sign is -1) number of usages of each condition term
+    in non resolved conds of assignments to termUsage dict
+    """
+    if termUsage is None:
+        termUsage = {}
+    for a in assignments:
+        for c, negFlags in a._unresolvedConds.items():
+            n = termUsage.get(c, 0) + sign * len(negFlags)
+            if n:
+                termUsage[c] = n
+            else:
+                del termUsage[c]
+    return termUsage
     
 
-def extractCondTermOrderNonResolved(assignments, globalCondOrder):
+def extractCondTermOrderNonResolved(assignments, condRank, termUsage=None):
     """
     Extract condition order from non resolved condition terms in assignments
+
+    @param condRank: dict {term: index in condition order of parent level},
+                     used to resolve terms with same usage count
+    @param termUsage: dict {term: usage count} for assignments
+                      (is computed if not specified)
     """
-    termUsage = {}
-    resolved = [] 
-    
-    for a in assignments:
-        # add assignments without cond as statements
-        if len(a._unresolvedConds) == 0:
-            resolved.append(a)
-        else:
-            # else register this to termap to resolve most impact condition
-            for c in a._unresolvedConds:
-                try:
-                    r = termUsage[c[0]]
-                except KeyError:
-                    r = TermResolveReport(0, 0)
-                    termUsage[c[0]] = r
-                finally:
-                    r.usageCnt += 1
-                    r.maxStmId = max(a._instId, r.maxStmId)
+    resolved = [a for a in assignments if not a._unresolvedConds]
+    if termUsage is None:
+        termUsage = countTermUsage(assignments)
 
-    def trrSortKey(term):
-        termResRep = termUsage[term] 
-        return (termResRep.usageCnt, globalCondOrder.index(term), termResRep.maxStmId)
-                    
-    # id is used to make sorting more deterministic, but it is not optimal solution
     condOrder = sorted(termUsage.keys(),
-                      key=trrSortKey,
-                      reverse=True)
+                       key=lambda term: (termUsage[term], condRank[term]),
+                       reverse=True)
     return resolved, condOrder
\ No newline at end of file
@@ -1,17 +1,135 @@
 
+from itertools import islice
 
-class UniqList(list):
+
+class UniqList():
     """
     List of unique items
+
+    Order of insertion is preserved. Small lists (most of signals
+    have only few drivers/endpoints) are stored in list, when they grow
+    over SMALL items they are converted to keys of dict,
+    so append, contains and remove are O(1).
+
+    @attention: UniqList is not a subclass of list (isinstance(x, list) is False),
+        it supports read only list operations (iteration, len, indexing, slicing
+        which returns list, index, comparison with lists and tuples),
+        use list(uniqList) where real list is required.
+        Indexing by other index than 0 and -1 and index() are O(n)
+        for lists with more than SMALL items.
     """
-    def __init__(self, *args, **kwargs):
-        super(UniqList, self).__init__(*args, **kwargs)
-        self.__s = set()
-    
+    __slots__ = ["_items"]
+    SMALL = 8
+
+    def __init__(self, initSeq=()):
+        self._items = []
+        self.extend(initSeq)
+
     def append(self, item):
-        if item in self.__s:
+        """
+        @return: True if item was not present and it was appended
+        """
+        items = self._items
+        if item in items:
             return False
+
+        if isinstance(items, list):
+            if len(items) < self.SMALL:
+                items.append(item)
+                return True
+            items = self._items = dict.fromkeys(items)
+        items[item] = None
+        return True
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def discard(self, item):
+        """
+        Remove item if it is present
+
+        @return: True if item was removed
+        """
+        items = self._items
+        if isinstance(items, list):
+            for i, x in enumerate(items):
+                if x is item:
+                    del items[i]
+                    return True
+            try:
+                items.remove(item)
+            except ValueError:
+                return False
+            return True
         else:
-            self.__s.add(item)
-            list.append(self, item)
+            try:
+                del items[item]
+            except KeyError:
+                return False
             return True
+
+    def remove(self, item):
+        if not self.discard(item):
+            raise ValueError("%r is not in UniqList" % (item,))
+
+    def clear(self):
+        self._items = []
+
+    def index(self, item):
+        """
+        @attention: O(n)
+        """
+        for i, x in enumerate(self._items):
+            if x is item or x == item:
+                return i
+        raise ValueError("%r is not in UniqList" % (item,))
+
+    def count(self, item):
+        return int(item in self._items)
+
+    def __getitem__(self, index):
+        """
+        @return: item on index or list of items if index is slice
+        """
+        items = self._items
+        if isinstance(items, list):
+            return items[index]
+        elif isinstance(index, slice):
+            return list(items)[index]
+
+        size = len(items)
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError("UniqList index out of range")
+        elif index == size - 1:
+            return next(reversed(items))
+        return next(islice(items, index, None))
+
+    def __contains__(self, item):
+        return item in self._items
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __reversed__(self):
+        return reversed(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def __eq__(self, other):
+        if isinstance(other, UniqList):
+            other = other._items
+        elif not isinstance(other, (list, tuple)):
+            return NotImplemented
+        return list(self._items) == list(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, list(self._items))
@@ -0,0 +1,313 @@
+from bisect import bisect_right
+import json
+import os
+
+from hdl_toolkit.simulator.vcdReader import VcdReader, parseVcdValue
+
+
+class WaveBlock():
+    """
+    Part of trace between two checkpoints
+
+    @ivar startTime: time of first time marker in this block
+    @ivar offset: position of first time marker of this block in trace file
+    @ivar snapshot: dict {id: value string} values of all variables on start of block
+    @ivar summary: dict {id: [min, max, transitions, hasInvalid, last value string]}
+                   only for variables which have changed in this block
+    """
+    __slots__ = ["startTime", "offset", "snapshot", "summary"]
+
+    def __init__(self, startTime, offset, snapshot):
+        self.startTime = startTime
+        self.offset = offset
+        self.snapshot = snapshot
+        self.summary = {}
+
+
+class BucketSummary():
+    """
+    Level of detail summary of signal in one time bucket (= one pixel)
+    """
+    __slots__ = ["min", "max", "transitions", "hasInvalid", "last"]
+
+    def __init__(self, startVal):
+        self.min = None
+        self.max = None
+        self.transitions = 0
+        self.hasInvalid = False
+        self.last = startVal
+        self._addVal(startVal)
+
+    def _addVal(self, valStr):
+        if valStr is None:
+            return
+        v, vld = parseVcdValue(valStr)
+        if vld:
+            if self.min is None or v < self.min:
+                self.min = v
+            if self.max is None or v > self.max:
+                self.max = v
+        else:
+            self.hasInvalid = True
+
+    def change(self, valStr):
+        self.transitions += 1
+        self.last = valStr
+        self._addVal(valStr)
+
+    def merge(self, minVal, maxVal, transitions, hasInvalid, last):
+        if minVal is not None and (self.min is None or minVal < self.min):
+            self.min = minVal
+        if maxVal is not None and (self.max is None or maxVal > self.max):
+            self.max = maxVal
+        self.transitions += transitions
+        self.hasInvalid = self.hasInvalid or hasInvalid
+        self.last = last
+
+    def toJson(self):
+        return [self.min, self.max, self.transitions, self.hasInvalid]
+
+
+class WaveIndex():
+    """
+    Index over vcd trace which allows to load level of detail views
+    (tiles) of the trace without reading the whole file
+
+    Trace is split to blocks of approximately BLOCK_CHANGES value changes,
+    for each block there is stored the position in file, the values of all
+    signals on the start of block and min/max/transition summary of the signals
+    which were changing in this block.
+
+    Small time windows are read directly from trace file starting from nearest
+    checkpoint, large time windows are composed from block summaries.
+
+    @ivar reader: VcdReader for trace file
+    @ivar blocks: list of WaveBlock sorted by startTime
+    @ivar endTime: last time in trace
+    """
+    BLOCK_CHANGES = 16 * 1024
+    # maximum number of blocks which can be read to resolve single tile,
+    # if there is more of them block summaries are used instead
+    MAX_SCAN_BLOCKS = 32
+    INDEX_VERSION = 2
+
+    def __init__(self, fileName, blockChanges=None):
+        self.fileName = fileName
+        self.reader = VcdReader(fileName)
+        if blockChanges is not None:
+            self.BLOCK_CHANGES = blockChanges
+        self.blocks = []
+        self.endTime = 0
+        self._blockTimes = None
+
+    @classmethod
+    def forFile(cls, fileName, cacheFile=None):
+        """
+        Load index for trace file from cache file or build it and store it
+        in cache file (cache file is json, so it can not execute any code
+        when it is loaded)
+
+        @param cacheFile: file where index is cached (default is fileName + ".idx")
+        """
+        if cacheFile is None:
+            cacheFile = fileName + ".idx"
+        st = os.stat(fileName)
+        stamp = [cls.INDEX_VERSION, st.st_size, st.st_mtime]
+        try:
+            with open(cacheFile, "r") as f:
+                d = json.load(f)
+            if d["stamp"] == stamp:
+                self = cls(fileName)
+                self.blocks = [cls._blockFromJson(b) for b in d["blocks"]]
+                self.endTime = d["endTime"]
+                return self
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        self = cls(fileName)
+        self.build()
+        try:
+            with open(cacheFile, "w") as f:
+                json.dump({"stamp": stamp,
+                           "endTime": self.endTime,
+                           "blocks": [self._blockToJson(b) for b in self.blocks]}, f)
+        except OSError:
+            # index can work without cache
+            pass
+
+        return self
+
+    @staticmethod
+    def _blockToJson(b):
+        return [b.startTime, b.offset, b.snapshot, b.summary]
+
+    @staticmethod
+    def _blockFromJson(d):
+        startTime, offset, snapshot, summary = d
+        if not isinstance(snapshot, dict) or not isinstance(summary, dict):
+            raise ValueError("Invalid index block")
+        b = WaveBlock(int(startTime), int(offset), snapshot)
+        b.summary = summary
+        return b
+
+    def build(self):
+        """
+        Read whole trace once and build blocks
+        """
+        blocks = []
+        values = {}
+        block = None
+        changesInBlock = 0
+        blockLimit = self.BLOCK_CHANGES
+        now = 0
+
+        for now, _id, v in self.reader.changes(withOffsets=True):
+            if _id is None:
+                if block is None or changesInBlock >= blockLimit:
+                    block = WaveBlock(now, v, dict(values))
+                    blocks.append(block)
+                    changesInBlock = 0
+                continue
+            elif block is None:
+                # changes before first time marker
+                block = WaveBlock(0, self.reader.bodyOffset, {})
+                blocks.append(block)
+
+            changesInBlock += 1
+            values[_id] = v
+            s = block.summary.get(_id, None)
+            val, vld = parseVcdValue(v)
+            if s is None:
+                block.summary[_id] = [val, val, 1, not vld, v]
+            else:
+                s[4] = v
+                if vld:
+                    if s[0] is None or val < s[0]:
+                        s[0] = val
+                    if s[1] is None or val > s[1]:
+                        s[1] = val
+                else:
+                    s[3] = True
+                s[2] += 1
+
+        self.blocks = blocks
+        self.endTime = now
+        self._blockTimes = None
+
+    def _blockIndex(self, t):
+        """index of block which contains time t"""
+        bt = self._blockTimes
+        if bt is None:
+            bt = self._blockTimes = [b.startTime for b in self.blocks]
+        i = bisect_right(bt, t) - 1
+        return max(i, 0)
+
+    def signals(self):
+        """
+        @return: list of all signals in trace
+        """
+        return self.reader.vars
+
+    def tile(self, signalNames, t0, t1, width):
+        """
+        Load level of detail view of signals in time window
+
+        @param signalNames: iterable of hierarchical names of signals
+        @param t0: start time of window
+        @param t1: end time of window
+        @param width: number of buckets (pixels) for window
+        @return: dict {signal name: list of BucketSummary}
+        """
+        if t1 <= t0:
+            raise ValueError("Invalid time window %r - %r" % (t0, t1))
+        width = max(int(width), 1)
+
+        byId = {}
+        for name in signalNames:
+            v = self.reader.varsByName[name]
+            byId.setdefault(v.id, []).append(name)
+
+        res = {}
+        if not self.blocks:
+            for ids in byId.values():
+                for name in ids:
+                    res[name] = [BucketSummary(None) for _ in range(width)]
+            return res
+
+        first = self._blockIndex(t0)
+        last = self._blockIndex(t1)
+        if last - first + 1 > self.MAX_SCAN_BLOCKS:
+            buckets = self._tileFromSummaries(byId, first, last, t0, t1, width)
+        else:
+            buckets = self._tileFromTrace(byId, first, t0, t1, width)
+
+        for _id, names in byId.items():
+            for name in names:
+                res[name] = buckets[_id]
+        return res
+
+    def _tileFromTrace(self, byId, firstBlock, t0, t1, width):
+        """
+        Resolve tile by reading trace from checkpoint
+        """
+        block = self.blocks[firstBlock]
+        bucketSize = (t1 - t0) / width
+        values = dict((_id, block.snapshot.get(_id, None)) for _id in byId)
+        buckets = dict((_id, []) for _id in byId)
+
+        def fill(_id, upToBucket):
+            # create buckets without changes up to upToBucket
+            b = buckets[_id]
+            while len(b) <= upToBucket:
+                b.append(BucketSummary(values[_id]))
+            return b[upToBucket]
+
+        for now, _id, v in self.reader.changes(block.offset, ids=byId):
+            if _id is None:
+                if now > t1:
+                    break
+                continue
+            if now < t0:
+                values[_id] = v
+                continue
+            bi = min(int((now - t0) / bucketSize), width - 1)
+            fill(_id, bi).change(v)
+            values[_id] = v
+
+        for _id in byId:
+            fill(_id, width - 1)
+        return buckets
+
+    def _tileFromSummaries(self, byId, firstBlock, lastBlock, t0, t1, width):
+        """
+        Resolve tile from block summaries, every block is accounted
+        to the bucket where it starts
+        """
+        bucketSize = (t1 - t0) / width
+        blocks = self.blocks
+        first = blocks[firstBlock]
+        values = dict((_id, first.snapshot.get(_id, None)) for _id in byId)
+        buckets = dict((_id, []) for _id in byId)
+
+        def fill(_id, upToBucket):
+            b = buckets[_id]
+            while len(b) <= upToBucket:
+                b.append(BucketSummary(values[_id]))
+            return b[upToBucket]
+
+        for bi in range(firstBlock, lastBlock + 1):
+            block = blocks[bi]
+            bucketI = min(max(int((block.startTime - t0) / bucketSize), 0),
+                          width - 1)
+            for _id in byId:
+                s = block.summary.get(_id, None)
+                if s is None:
+                    continue
+                minVal, maxVal, transitions, hasInvalid, last = s
+                fill(_id, bucketI).merge(minVal, maxVal, transitions,
+                                         hasInvalid, last)
+                values[_id] = last
+
+        for _id in byId:
+            fill(_id, width - 1)
+        return buckets
@@ -1,11 +1,93 @@
+import glob
+import os
+
+from flask import request, abort
 from flask.blueprints import Blueprint
 from flask.templating import render_template
+from werkzeug.utils import safe_join
+
+from hw_toolkit_visualizer.connectionsJsonObj import jsonResp
+from hw_toolkit_visualizer.waveIndex import WaveIndex
 
 
+TRACE_DIR = "tmp/"
+
 waveBp = Blueprint('wave', __name__,
                           template_folder='templates/wave/')
 
+# {trace file path: WaveIndex}
+_indexes = {}
+
+
+def getIndex(path):
+    """
+    Get index for trace file, index is rebuilt if trace file has changed
+    (responds 404 if path is not a file in TRACE_DIR)
+    """
+    fileName = safe_join(TRACE_DIR, path)
+    if fileName is None or not os.path.isfile(fileName):
+        abort(404)
+    root = os.path.realpath(TRACE_DIR)
+    if os.path.commonpath([root, os.path.realpath(fileName)]) != root:
+        # symlink out of TRACE_DIR
+        abort(404)
+    idx = _indexes.get(fileName, None)
+    st = os.stat(fileName)
+    stamp = (st.st_size, st.st_mtime)
+    if idx is None or idx[0] != stamp:
+        idx = _indexes[fileName] = (stamp, WaveIndex.forFile(fileName))
+
+    return idx[1]
+
 
 @waveBp.route('/wave-test/')
 def connections_test():
     return render_template('wave_test.html')
+
+
+@waveBp.route('/wave/traces/')
+def traces():
+    """
+    List of all vcd files in TRACE_DIR
+    """
+    files = glob.glob(os.path.join(TRACE_DIR, "**", "*.vcd"), recursive=True)
+    return jsonResp(sorted(os.path.relpath(f, TRACE_DIR) for f in files))
+
+
+@waveBp.route('/wave/signals/<path:path>')
+def signals(path):
+    """
+    List of signals in trace and time range of trace
+    """
+    idx = getIndex(path)
+    return jsonResp({"endTime": idx.endTime,
+                     "timescale": idx.reader.timescale,
+                     "signals": idx.signals()})
+
+
+@waveBp.route('/wave/tile/<path:path>')
+def tile(path):
+    """
+    Level of detail view of trace
+
+    query params: signals (comma separated hierarchical names),
+    t0, t1 (time window), width (number of buckets (pixels))
+    response: {signal name: [[min, max, transitions, hasInvalid], ...]}
+    """
+    idx = getIndex(path)
+    args = request.args
+    signalNames = [s for s in args.get("signals", "").split(",") if s]
+    varsByName = idx.reader.varsByName
+    for s in signalNames:
+        if s not in varsByName:
+            abort(404, "Signal %s not found in %s" % (s, path))
+    try:
+        t0 = int(args.get("t0", 0))
+        t1 = int(args.get("t1", max(idx.endTime, t0 + 1)))
+        width = int(args.get("width", 1000))
+    except ValueError:
+        abort(400, "t0, t1 and width have to be integers")
+    if t1 <= t0 or width < 1:
+        abort(400, "Invalid time window %d - %d or width %d" % (t0, t1, width))
+
+    return jsonResp(idx.tile(signalNames, t0, t1, width))
@@ -14,7 +14,8 @@ setup(name='hwtoolkit',
         'Pillow', # altium scheme reader
         'simpy',  # discrete simulator 
         'jinja2', # hdl templates renderer, visualizer renderer
-        'flask'  # visualizer
+        'flask', # visualizer
+        'numpy'  # columnar storage of simulation data
       ],
       license='MIT',
       packages = find_packages(),